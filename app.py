@@ -1,28 +1,105 @@
 import streamlit as st
 from pathlib import Path
 import sys
-import base64
 import os
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import hashlib
+import html
 import logging
-from typing import Optional
+import math
+import orjson
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+# pandas/plotly are only needed once results exist, so they are imported where used
+# to keep them off the first-paint path
+if TYPE_CHECKING:
+    import pandas as pd
+    import plotly.graph_objects as go
 
 # Configure logging for better debugging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+APP_DIR = Path(__file__).parent
+ASSETS_DIR = APP_DIR / "assets"
+
 # Add utils to path
-sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(APP_DIR))
 
-from utils.pdf_extractor import extract_text_from_pdf
-from utils.llm_analyzer import extract_and_analyze_combined, set_api_key, identify_contract_type
+from utils.pdf_extractor import extract_text_from_pdf, validate_pdf_bytes
+from utils.llm_analyzer import extract_and_analyze_combined, set_api_key, identify_contract_type, extract_identify_and_analyze, \
+    ContractTypeInfo, ANALYSIS_EXCERPT_LIMIT
+from utils.asc606_engine import schedule_to_columns
 
 # Constants
 MAX_FILE_SIZE_MB = 20
 SUPPORTED_FILE_TYPES = ['pdf']
 
+# Uploaded PDFs live under Streamlit's static folder (see .streamlit/config.toml)
+# so the viewer can load them by URL
+STATIC_CONTRACTS_DIR = APP_DIR / "static" / "contracts"
+STATIC_CONTRACTS_URL = "app/static/contracts"
+# Saved uploads are publicly served, so they are removed when the session's upload changes
+# and any left behind (Streamlit has no session-end hook) are pruned after this long
+UPLOAD_RETENTION_SECONDS = 3600
+
+# Contract fields carried into edit mode; pricing_schedule isn't editable but is kept
+# so the re-run analysis still sees it
+EDITABLE_CONTRACT_FIELDS = (
+    'customer_name', 'vendor_name', 'contract_start_date', 'contract_end_date',
+    'total_contract_value', 'payment_terms', 'performance_obligations', 'obligations',
+    'pricing_schedule',
+)
+
+OBLIGATION_EDIT_COLUMNS = ['name', 'description', 'allocated_value']
+
+OBLIGATION_TABLE_HEADER = """
+<table class="obligation-table">
+    <thead>
+        <tr>
+            <th>#</th>
+            <th>Obligation</th>
+            <th>Description</th>
+            <th>Allocated Value</th>
+        </tr>
+    </thead>
+    <tbody>
+"""
+
+# Welcome page copy
+WELCOME_MD = """
+**Step 1:** Upload your PDF contract  
+**Step 2:** AI analyzes the contract  
+**Step 3:** View ASC 606 compliance
+"""
+
+ABOUT_MD = """
+This tool analyzes SaaS contracts using the **ASC 606 revenue recognition framework**:
+
+**The Five-Step Model:**
+1. Identify the contract with a customer
+2. Identify performance obligations
+3. Determine the transaction price
+4. Allocate the transaction price
+5. Recognize revenue when obligations are satisfied
+
+**What you'll get:**
+- Automated contract data extraction
+- Complete ASC 606 compliance analysis
+- Revenue recognition schedule with multi-obligation support
+- Interactive visualizations
+"""
+
+# Background PDF extraction
+EXTRACTION_CACHE_SIZE = 32
+EXTRACTION_POLL_SECONDS = 0.5
+# Prompts only send a prefix of the contract, so stop reading pages once we have it (plus headroom)
+EXTRACTION_CHAR_LIMIT = ANALYSIS_EXCERPT_LIMIT * 3 // 2
+
 # Chart configuration constants
 CHART_HEIGHT = 400
 CHART_MARGIN = dict(l=0, r=0, t=40, b=0)
@@ -36,12 +113,17 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+@st.cache_resource(show_spinner=False)
+def _read_css(css_path: Path) -> str:
+    """Read a stylesheet once per process instead of on every rerun."""
+    return css_path.read_text(encoding="utf-8")
+
+
 def _load_local_css(css_path: Path) -> None:
     """Load local CSS with error handling."""
     try:
-        with open(css_path, "r", encoding="utf-8") as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-            logger.debug(f"✓ Loaded CSS from {css_path}")
+        st.markdown(f"<style>{_read_css(css_path)}</style>", unsafe_allow_html=True)
+        logger.debug(f"✓ Loaded CSS from {css_path}")
     except FileNotFoundError:
         logger.warning(f"CSS file not found: {css_path}")
     except Exception as e:
@@ -62,9 +144,15 @@ def _validate_uploaded_file(uploaded_file) -> Optional[str]:
         return f"Invalid file type: {uploaded_file.type}. Only PDF files are supported."
     
     # Check file name
-    if not uploaded_file.name.lower().endswith('.pdf'):
+    if uploaded_file.name[-4:].lower() != '.pdf':
         return "Invalid file extension. Only PDF files are supported."
     
+    # Type and extension are client-controlled; check the content with the extractor's own rule
+    try:
+        validate_pdf_bytes(uploaded_file.getbuffer())
+    except ValueError as e:
+        return str(e)
+    
     return None
 
 
@@ -110,46 +198,313 @@ def _initialize_api_key() -> Optional[str]:
 
 
 # Load CSS and initialize
-_load_local_css(Path(__file__).parent / "assets" / "styles.css")
+_load_local_css(ASSETS_DIR / "styles.css")
 
 if 'api_key' not in st.session_state:
     st.session_state.api_key = _initialize_api_key()
 
 api_key = st.session_state.api_key
 
+# The Gemini client is process-wide, so re-apply this session's key on every run in case
+# another session switched it; set_api_key is a no-op when the key is already active
 if api_key:
     try:
         set_api_key(api_key)
-        logger.info("✓ API key configured successfully")
+        logger.debug("✓ API key configured")
     except Exception as e:
         logger.error(f"Error setting API key: {e}")
         st.session_state.api_key = None
         api_key = None
 
-# Cache PDF text extraction to avoid re-running
-@st.cache_data(show_spinner=False)
-def cached_extract_text(pdf_path: str) -> str:
-    """Cache PDF text extraction."""
-    return extract_text_from_pdf(pdf_path)
-
-
-# Cache PDF display to avoid re-encoding
-@st.cache_data(show_spinner=False)
-def get_pdf_display_html(pdf_path: str) -> str:
+# PDF text extraction runs on a process-wide worker pool so the viewer renders while it
+# works. Jobs are keyed on the content hash, so re-uploads of the same file reuse the
+# finished Future; the registry keeps the most recent EXTRACTION_CACHE_SIZE jobs.
+@st.cache_resource(show_spinner=False)
+def _extraction_jobs() -> Tuple[ThreadPoolExecutor, "OrderedDict[str, Future]", threading.Lock]:
+    """Worker pool, content-hash -> Future registry and the lock guarding it."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-extract"), OrderedDict(), threading.Lock()
+
+
+def start_text_extraction(pdf_hash: str, pdf_bytes: memoryview) -> Future:
+    """Start background text extraction for a PDF, or return the existing job for it."""
+    executor, jobs, lock = _extraction_jobs()
+    with lock:
+        future = jobs.get(pdf_hash)
+        if future is None:
+            future = executor.submit(extract_text_from_pdf, pdf_bytes, EXTRACTION_CHAR_LIMIT)
+            jobs[pdf_hash] = future
+        jobs.move_to_end(pdf_hash)
+        while len(jobs) > EXTRACTION_CACHE_SIZE:
+            jobs.popitem(last=False)
+    return future
+
+
+def discard_text_extraction(pdf_hash: str) -> None:
+    """Drop a job from the registry so a failed extraction is retried on the next attempt."""
+    _, jobs, lock = _extraction_jobs()
+    with lock:
+        jobs.pop(pdf_hash, None)
+
+
+@st.fragment(run_every=EXTRACTION_POLL_SECONDS)
+def render_extraction_status(future: Future) -> None:
+    """Show progress while extraction runs and rerun the app once it has finished."""
+    if future.done():
+        st.rerun()
+    st.info("Extracting text from PDF...")
+
+
+# Cache PDF display HTML; the browser fetches the file itself from the static server
+@st.cache_data(max_entries=16, ttl="1h", show_spinner=False)
+def get_pdf_display_html(pdf_hash: str, _pdf_path: str) -> str:
     """Cache PDF display HTML."""
-    with open(pdf_path, "rb") as f:
-        base64_pdf = base64.b64encode(f.read()).decode('utf-8')
-    return f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="1000" type="application/pdf"></iframe>'
-
+    pdf_url = f"{STATIC_CONTRACTS_URL}/{quote(Path(_pdf_path).name)}"
+    return f'<iframe src="{pdf_url}" width="100%" height="1000" type="application/pdf"></iframe>'
+
+
+
+# Cache revenue schedule artifacts so unrelated reruns skip DataFrame construction,
+# CSV encoding and Plotly layout. Keyed on the schedule's JSON (hashable and stable).
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_schedule_df(schedule_json: str) -> "pd.DataFrame":
+    """Build the revenue schedule DataFrame with explicit column dtypes."""
+    import pandas as pd
+    columns = schedule_to_columns(orjson.loads(schedule_json))
+    # Build typed column arrays before handing them to pandas, so neither the frame constructor
+    # nor Arrow serialization has to infer object columns cell by cell
+    for col, values in columns.items():
+        if col.startswith('revenue_') or col == 'deferred_revenue':
+            columns[col] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+        elif col in ('period', 'period_start', 'period_end'):
+            columns[col] = pd.array(values, dtype='string')
+    return pd.DataFrame(columns)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def prepare_schedule_display(schedule_json: str) -> Tuple["pd.DataFrame", List[str], Dict[str, Any]]:
+    """
+    Prepare the schedule table for display.
+
+    Returns the reordered, currency-formatted DataFrame, the obligation-specific
+    revenue columns and the st.dataframe column_config.
+    """
+    schedule_df = build_schedule_df(schedule_json)
+    # Identify obligation-specific columns
+    obligation_cols = [col for col in schedule_df.columns if col.startswith('revenue_') and col != 'revenue_amount']
+
+    # Reorder columns for better display
+    base_cols = ['period', 'period_start', 'period_end']
+    display_cols = base_cols + obligation_cols + ['revenue_amount', 'deferred_revenue']
+    # Keep only columns that exist
+    display_cols = [col for col in display_cols if col in schedule_df.columns]
+    # Add any remaining columns not already included
+    remaining_cols = [col for col in schedule_df.columns if col not in display_cols]
+    display_cols.extend(remaining_cols)
+
+    display_df = schedule_df[display_cols].copy()
+
+    # Format currency columns for display, one vectorized pass per column
+    currency_cols = ['revenue_amount', 'deferred_revenue'] + obligation_cols
+    for col in currency_cols:
+        if col in display_df.columns:
+            display_df[col] = display_df[col].map("${:,.2f}".format, na_action='ignore')
+
+    # Configure column display settings to ensure all columns are visible
+    column_config = {}
+    for col in display_df.columns:
+        if col.startswith('revenue_'):
+            # Make revenue columns more prominent
+            column_config[col] = st.column_config.TextColumn(
+                col.replace('revenue_', '').replace('_', ' ').title(),
+                width="medium",
+                help=f"Revenue for {col.replace('revenue_', '')}"
+            )
+        elif col == 'deferred_revenue':
+            column_config[col] = st.column_config.TextColumn(
+                "Deferred Revenue",
+                width="medium"
+            )
+    return display_df, obligation_cols, column_config
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def schedule_csv_bytes(schedule_json: str) -> bytes:
+    """Encode the revenue schedule as CSV bytes for download."""
+    return build_schedule_df(schedule_json).to_csv(index=False).encode('utf-8')
+
+
+# Figures are cached as shared resources rather than pickled per hit; st.plotly_chart does not mutate them
+@st.cache_resource(show_spinner=False, max_entries=16)
+def schedule_bar_fig(schedule_json: str, selected_cols: tuple, barmode: str) -> "go.Figure":
+    """Build the stacked/grouped revenue bar chart."""
+    import plotly.graph_objects as go
+    schedule_df = build_schedule_df(schedule_json)
+    # One go.Bar per column straight from the wide frame; px.bar would melt it to long form first
+    fig = go.Figure([
+        go.Bar(x=schedule_df['period'], y=schedule_df[col], name=col)
+        for col in selected_cols
+    ])
+    fig.update_layout(
+        title="Revenue Recognition by Period",
+        xaxis_title="Period",
+        yaxis_title="Revenue",
+        legend_title_text="Obligation",
+        showlegend=True,
+        barmode=barmode,
+        height=CHART_HEIGHT,
+        margin=CHART_MARGIN,
+        legend=CHART_LEGEND
+    )
+    return fig
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def schedule_line_fig(schedule_json: str, selected_cols: tuple) -> "go.Figure":
+    """Build the revenue recognition trend line chart."""
+    import plotly.graph_objects as go
+    schedule_df = build_schedule_df(schedule_json)
+    fig = go.Figure()
+    for col in selected_cols:
+        fig.add_trace(go.Scattergl(
+            x=schedule_df['period'],
+            y=schedule_df[col],
+            mode='lines+markers',
+            name=col.replace('revenue_', '').replace('_', ' ').title(),
+            line=dict(width=3),
+            marker=dict(size=8)
+        ))
+
+    fig.update_layout(
+        title="Revenue Recognition Trend",
+        xaxis_title="Period",
+        yaxis_title="Revenue",
+        height=CHART_HEIGHT,
+        margin=CHART_MARGIN,
+        legend=CHART_LEGEND,
+        hovermode='x unified'
+    )
+    return fig
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def schedule_deferred_fig(schedule_json: str) -> "go.Figure":
+    """Build the deferred revenue area chart."""
+    import plotly.graph_objects as go
+    schedule_df = build_schedule_df(schedule_json)
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=schedule_df['period'],
+        y=schedule_df['deferred_revenue'],
+        mode='lines+markers',
+        name='Deferred Revenue',
+        fill='tozeroy',
+        line=dict(color='#FF6B6B', width=3),
+        marker=dict(size=8)
+    ))
+
+    fig.update_layout(
+        title="Deferred Revenue Over Time",
+        xaxis_title="Period",
+        yaxis_title="Deferred Revenue",
+        height=DEFERRED_CHART_HEIGHT,
+        margin=CHART_MARGIN,
+        hovermode='x unified'
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_steps_html(analysis_json: str) -> str:
+    """Build the collapsible ASC 606 five-step breakdown as a single HTML block."""
+    analysis = orjson.loads(analysis_json)
+    parts = []
+    for step_num in range(1, 6):
+        step = analysis.get(f"step_{step_num}")
+        if not step:
+            continue
+        details_html = ''.join(f"<li>{html.escape(str(detail))}</li>" for detail in step.get('details') or [])
+        parts.append(
+            f"<details class='asc606-step'><summary>Step {step_num}: {html.escape(str(step.get('title', '')))}</summary>"
+            f"<p>{html.escape(str(step.get('description', '')))}</p>"
+            f"{f'<ul>{details_html}</ul>' if details_html else ''}</details>"
+        )
+    return ''.join(parts)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_type_banner_html(info: ContractTypeInfo) -> str:
+    """Build the Step 1 contract type banner markup."""
+    # Escape LLM-provided text before it goes into unsafe_allow_html markup
+    contract_type = html.escape(info.contract_type)
+    reasoning = html.escape(info.reasoning)
+
+    # Map confidence to pill style
+    pill_class = {
+        'high': 'pill--high',
+        'medium': 'pill--medium',
+        'low': 'pill--low'
+    }.get(info.confidence, 'pill--low')
+
+    chips_html = ''.join(f"<span class='chip'>{html.escape(ind)}</span>" for ind in info.key_indicators)
+    return f"""
+    <div class="type-banner">
+      <div class="type-row">
+        <div>
+          <div class="type-value">{contract_type}</div>
+        </div>
+        <div class="pill {pill_class}">{html.escape(info.confidence.title())} confidence</div>
+      </div>
+      <div class="type-title">Reasoning</div>
+      <div class="type-reason">{reasoning}</div>
+      {f"<div class='type-title' style='margin-top:8px;'>Key indicators</div><div class='chips'>{chips_html}</div>" if info.key_indicators else ''}
+    </div>
+    """
 
 
 # Helper: Format currency values consistently
 def _format_currency(value):
+    # Fast path for the common case of an already-numeric value
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return f"${value:,.2f}"
+    # Only a bare amount (optional leading $, thousands separators) is reformatted; anything
+    # else, e.g. "1.5 million" or "USD 2,000 per month", is shown as written
     try:
-        value_float = float(str(value).replace(',', ''))
-        return f"${value_float:,.2f}"
-    except Exception:
+        numeric = float(str(value).strip().removeprefix('$').replace(',', ''))
+    except (TypeError, ValueError):
+        numeric = math.nan
+    if not math.isfinite(numeric):
         return str(value) if value not in [None, '', 0] else 'N/A'
+    return f"${numeric:,.2f}"
+
+# Helper: Copy only the contract fields the edit form works with
+def _editable_copy(data):
+    edited = {key: data.get(key) for key in EDITABLE_CONTRACT_FIELDS if key in data}
+    # Fresh obligation dicts so edits never alias the extracted data
+    if isinstance(edited.get('obligations'), list):
+        edited['obligations'] = [dict(ob) for ob in edited['obligations'] if isinstance(ob, dict)]
+    return edited
+
+def _analysis_cache_keys(analysis: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """
+    Return the stable JSON keys (steps, revenue schedule) for the cached render helpers.
+
+    The keys are memoized in session state against the analysis object itself, so
+    reruns that don't produce a new analysis skip re-serializing it.
+    """
+    cached = st.session_state.get('analysis_json_cache')
+    if cached is not None and cached[0] is analysis:
+        return cached[1], cached[2]
+
+    steps_json = orjson.dumps(
+        {key: value for key, value in analysis.items() if key != 'revenue_schedule'},
+        option=orjson.OPT_SORT_KEYS
+    ).decode()
+    schedule_json = None
+    if 'revenue_schedule' in analysis:
+        # No OPT_SORT_KEYS: record key order is already deterministic and sets the column order
+        schedule_json = orjson.dumps(analysis['revenue_schedule']).decode()
+    st.session_state.analysis_json_cache = (analysis, steps_json, schedule_json)
+    return steps_json, schedule_json
 
 # Helper: Initialize session state keys if missing
 def _init_session_state(keys_defaults):
@@ -161,7 +516,8 @@ _init_session_state({
     'contract_text': None,
     'contract_type_info': None,
     'extracted_data': None,
-    'asc606_analysis': None
+    'asc606_analysis': None,
+    'temp_pdf_path': None
 })
 
 # Check if API key is set
@@ -185,6 +541,270 @@ if not api_key:
 
     st.stop()
 
+
+@st.fragment
+def render_edit_form() -> None:
+    """Render the contract details edit form; typing in it reruns only this fragment."""
+    # Edit mode: show input fields
+    edited = st.session_state.get('edited_contract_data', {}).copy()
+    col_a, col_b = st.columns(2)
+    with col_a:
+        edited['customer_name'] = st.text_input("Customer", value=edited.get('customer_name', ''))
+        edited['contract_start_date'] = st.text_input("Start Date (YYYY-MM-DD)", value=edited.get('contract_start_date', ''))
+        edited['total_contract_value'] = st.text_input("Total Value", value=str(edited.get('total_contract_value', '')))
+    with col_b:
+        edited['vendor_name'] = st.text_input("Vendor", value=edited.get('vendor_name', ''))
+        edited['contract_end_date'] = st.text_input("End Date (YYYY-MM-DD)", value=edited.get('contract_end_date', ''))
+        edited['payment_terms'] = st.text_input("Terms", value=edited.get('payment_terms', ''))
+
+    # Obligations (simple editable list)
+    st.markdown("**Obligations (comma separated):**")
+    perf_ob_str = ', '.join(edited.get('performance_obligations', [])) if isinstance(edited.get('performance_obligations', []), list) else ''
+    perf_ob_str = st.text_input("Performance Obligations", value=perf_ob_str)
+    edited['performance_obligations'] = [s.strip() for s in perf_ob_str.split(',')] if perf_ob_str else []
+
+    # Obligations with allocated value: one data editor instead of a row of inputs per obligation
+    import pandas as pd
+    obligations = edited.get('obligations') or []
+    st.markdown("**Obligation Allocations:** (edit below)")
+    obligations_df = pd.DataFrame(
+        [{
+            'name': str(ob.get('name', '')),
+            'description': str(ob.get('description', '')),
+            'allocated_value': str(ob.get('allocated_value', '')),
+        } for ob in obligations],
+        columns=OBLIGATION_EDIT_COLUMNS,
+    )
+    edited_df = st.data_editor(
+        obligations_df,
+        key="obligations_editor",
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'name': st.column_config.TextColumn("Obligation Name"),
+            'description': st.column_config.TextColumn("Description"),
+            'allocated_value': st.column_config.TextColumn("Allocated Value"),
+        },
+    )
+    # Rows added in the editor start out empty; drop any left blank
+    edited['obligations'] = [
+        {col: row[col] or '' for col in OBLIGATION_EDIT_COLUMNS}
+        for row in edited_df.astype(object).where(edited_df.notna(), None).to_dict('records')
+        if any(row[col] for col in OBLIGATION_EDIT_COLUMNS)
+    ]
+
+    # Save and re-run analysis button, plus cancel
+    run_col, cancel_col = st.columns([2,1])
+    with run_col:
+        if st.button("Save and re-run analysis", key="save_rerun_btn", type="primary"):
+            st.session_state.edited_contract_data = edited
+            st.session_state.edit_mode = False
+            st.session_state.extracted_data = edited
+            st.session_state.asc606_analysis = None
+            try:
+                # The edited details are JSON, not PDF prose, so skip the prose check
+                result = extract_and_analyze_combined(orjson.dumps(edited).decode(), check_prose=False)
+                st.session_state.extracted_data = result['contract_info']
+                st.session_state.asc606_analysis = result['asc606_analysis']
+                st.success("Analysis complete with edited details!")
+                st.rerun()
+            except Exception as e:
+                st.error(f"Analysis failed: {str(e)}")
+    with cancel_col:
+        if st.button("Cancel", key="cancel_edit_btn"):
+            st.session_state.edit_mode = False
+            st.rerun()
+
+
+@st.fragment
+def render_revenue_viz(schedule_json: str, obligation_cols: list) -> None:
+    """Render the revenue charts; chart controls rerun only this fragment."""
+    schedule_df = build_schedule_df(schedule_json)
+
+    # Enhanced visualization
+    st.markdown("**Revenue Visualization**")
+
+    # Let user choose what to visualize
+    viz_type = st.radio(
+        "Visualization type:",
+        ["Stacked", "Grouped", "Line Chart"],
+        horizontal=True,
+        help="Choose how to display revenue data"
+    )
+
+    # Column selection for visualization
+    all_revenue_cols = obligation_cols + ['revenue_amount']
+    default_cols = ['revenue_amount'] if 'revenue_amount' in all_revenue_cols else obligation_cols[:1]
+
+    selected_cols = st.multiselect(
+        "Select revenue columns to visualize:",
+        all_revenue_cols,
+        default=default_cols if obligation_cols else ['revenue_amount']
+    )
+
+    if selected_cols:
+        # Create visualization based on type
+        if viz_type == "Stacked":
+            fig = schedule_bar_fig(schedule_json, tuple(selected_cols), 'stack')
+
+        elif viz_type == "Grouped":
+            fig = schedule_bar_fig(schedule_json, tuple(selected_cols), 'group')
+
+        else:  # Line Chart
+            fig = schedule_line_fig(schedule_json, tuple(selected_cols))
+
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Add deferred revenue chart if available
+        if 'deferred_revenue' in schedule_df.columns:
+            with st.expander("View Deferred Revenue", expanded=False):
+                fig_deferred = schedule_deferred_fig(schedule_json)
+                st.plotly_chart(fig_deferred, use_container_width=True)
+
+
+@st.fragment
+def render_results() -> None:
+    """Render the Contract Details / ASC 606 Analysis tabs.
+
+    As a fragment, widget interactions inside the tabs rerun only this block,
+    not the upload handling or the PDF viewer.
+    """
+    tab1, tab2 = st.tabs(["Contract Details", "ASC 606 Analysis"])
+
+    # Use edited data if available, else extracted
+    data = st.session_state.get('edited_contract_data') or st.session_state.extracted_data
+
+    with tab1:
+        if 'edit_mode' not in st.session_state:
+            st.session_state.edit_mode = False
+
+        if not st.session_state.edit_mode:
+            # Display contract details (read-only)
+            col_a, col_b = st.columns(2)
+            with col_a:
+                st.metric("Customer", data.get('customer_name', 'N/A'))
+                st.metric("Start", data.get('contract_start_date', 'N/A'))
+                total_value = data.get('total_contract_value', 0)
+                st.metric("Total Value", _format_currency(total_value))
+            with col_b:
+                st.metric("Vendor", data.get('vendor_name', 'N/A'))
+                st.metric("End", data.get('contract_end_date', 'N/A'))
+                st.metric("Terms", data.get('payment_terms', 'N/A'))
+
+            if data.get('performance_obligations'):
+                st.markdown("**Obligations:**")
+                for i, po in enumerate(data.get('performance_obligations', []), 1):
+                    st.caption(f"{i}. {po}")
+
+            obligations = data.get('obligations')
+            if obligations and isinstance(obligations, list) and len(obligations) > 0:
+                st.markdown("**Obligation Allocations:**")
+                obligations_table = []
+                for idx, ob in enumerate(obligations, 1):
+                    name = ob.get('name', 'N/A')
+                    desc = ob.get('description', '')
+                    value = ob.get('allocated_value', 0)
+                    value_str = _format_currency(value)
+                    # Name/description come from the model and go into unsafe_allow_html markup
+                    obligations_table.append((
+                        str(idx), html.escape(str(name)), html.escape(str(desc)), html.escape(value_str)
+                    ))
+                rows_html = ''.join(
+                    f"<tr><td>{row[0]}</td><td>{row[1]}</td><td>{row[2]}</td><td>{row[3]}</td></tr>"
+                    for row in obligations_table
+                )
+                table_html = OBLIGATION_TABLE_HEADER + rows_html + "</tbody></table>"
+                st.markdown(table_html, unsafe_allow_html=True)
+
+            # Edit button
+            if st.button("Edit Details", key="edit_details_btn"):
+                st.session_state.edit_mode = True
+                st.session_state.edited_contract_data = _editable_copy(data)
+                st.rerun()
+
+        else:
+            render_edit_form()
+    
+    with tab2:
+        if st.session_state.asc606_analysis:
+            analysis = st.session_state.asc606_analysis
+            
+            steps_json, schedule_json = _analysis_cache_keys(analysis)
+            
+            # Display each step - one markdown element instead of an expander per step
+            steps_html = build_steps_html(steps_json)
+            st.markdown(steps_html, unsafe_allow_html=True)
+        
+            # Revenue schedule
+            if schedule_json is not None:
+                st.markdown("---")
+                st.markdown("**Revenue Schedule**")
+                schedule_df = build_schedule_df(schedule_json)
+                if len(schedule_df) > 0 and 'error' not in schedule_df.columns:
+                    display_df, obligation_cols, column_config = prepare_schedule_display(schedule_json)
+                    
+                    # Show multi-obligation summary if applicable
+                    if obligation_cols:
+                        st.info(f"📊 Multi-obligation contract with {len(obligation_cols)} performance obligations")
+                    
+                    # Display the dataframe with all columns and custom config
+                    st.dataframe(
+                        display_df,
+                        use_container_width=True,
+                        hide_index=True,
+                        height=min(400, len(display_df) * 35 + 38),
+                        column_config=column_config
+                    )
+                    
+                    # Download CSV with raw numbers
+                    csv_data = schedule_csv_bytes(schedule_json)
+                    st.download_button(
+                        label="📥 Download Revenue Schedule (CSV)",
+                        data=csv_data,
+                        file_name="revenue_schedule.csv",
+                        mime="text/csv",
+                        use_container_width=True,
+                    )
+                    
+                    render_revenue_viz(schedule_json, obligation_cols)
+                else:
+                    st.warning("Unable to generate revenue schedule")
+        else:
+            st.info("Complete the contract analysis to view ASC 606 breakdown")
+
+
+@st.fragment
+def render_pdf_viewer(pdf_hash: str, pdf_path: str) -> None:
+    """Render the PDF viewer in isolation from the rest of the script."""
+    # Display PDF using cached function
+    try:
+        pdf_display = get_pdf_display_html(pdf_hash, pdf_path)
+        st.markdown(pdf_display, unsafe_allow_html=True)
+    except Exception as e:
+        st.error(f"Error displaying PDF: {str(e)}")
+
+
+def _remove_saved_pdf(pdf_path: Optional[str]) -> None:
+    """Delete a saved upload from the static folder."""
+    if pdf_path:
+        try:
+            Path(pdf_path).unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not remove saved PDF: {e}")
+
+
+def _prune_saved_pdfs() -> None:
+    """Delete saved uploads older than UPLOAD_RETENTION_SECONDS."""
+    cutoff = time.time() - UPLOAD_RETENTION_SECONDS
+    for pdf_path in STATIC_CONTRACTS_DIR.glob("*.pdf"):
+        try:
+            if pdf_path.stat().st_mtime < cutoff:
+                pdf_path.unlink()
+        except OSError:
+            continue  # raced with another session
+
+
 # Create 2-column layout from the start: Left = Upload & Analysis, Right = PDF Viewer
 col_left, col_right = st.columns([1, 1], gap="medium")
 
@@ -203,26 +823,33 @@ with col_left:
         uploaded_file = None
 
 if uploaded_file is not None:
-    # Generate a unique key for the uploaded file
-    file_key = f"{uploaded_file.name}_{uploaded_file.size}"
-    
-    # Check if this is a new file
-    if 'current_file_key' not in st.session_state or st.session_state.current_file_key != file_key:
-        # Reset session state for new file
-        st.session_state.current_file_key = file_key
-        st.session_state.contract_text = None
-        st.session_state.contract_type_info = None
-        st.session_state.extracted_data = None
-        st.session_state.asc606_analysis = None
-        st.session_state.temp_pdf_path = None
-    
-    # Save PDF once if not already saved
-    if st.session_state.temp_pdf_path is None:
-        temp_pdf_path = Path("data/contracts") / uploaded_file.name
-        temp_pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    # Hash the content once per upload; file_id changes whenever a file is (re-)uploaded
+    if st.session_state.get('current_upload_id') != uploaded_file.file_id:
+        st.session_state.current_upload_id = uploaded_file.file_id
+        # Content-addressed key: identical PDFs share cache entries and the saved file,
+        # and different PDFs with the same name and size no longer collide
+        file_key = hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
         
-        with open(temp_pdf_path, "wb") as f:
-            f.write(uploaded_file.getvalue())
+        # Check if this is a new file
+        if st.session_state.get('pdf_hash') != file_key:
+            # Reset session state for new file
+            st.session_state.pdf_hash = file_key
+            st.session_state.contract_text = None
+            st.session_state.contract_type_info = None
+            st.session_state.extracted_data = None
+            st.session_state.asc606_analysis = None
+            _remove_saved_pdf(st.session_state.temp_pdf_path)
+            st.session_state.temp_pdf_path = None
+    
+    # Save PDF if not already on disk (it may have been pruned, or removed by another
+    # session that uploaded the same content); only the viewer needs it
+    if st.session_state.temp_pdf_path is None or not os.path.exists(st.session_state.temp_pdf_path):
+        temp_pdf_path = STATIC_CONTRACTS_DIR / f"{st.session_state.pdf_hash}.pdf"
+        if not temp_pdf_path.exists():
+            temp_pdf_path.parent.mkdir(parents=True, exist_ok=True)
+            _prune_saved_pdfs()
+            with open(temp_pdf_path, "wb") as f:
+                f.write(uploaded_file.getbuffer())
         
         st.session_state.temp_pdf_path = str(temp_pdf_path)
     
@@ -230,452 +857,121 @@ if uploaded_file is not None:
     
     # Continue in left column
     with col_left:
-        # Extract text in background if not already done (using cache)
+        # Extract text in the background if not already done; finished jobs (including
+        # re-uploads of the same content) are picked up in this run
         if st.session_state.contract_text is None:
-            with st.spinner("Extracting text from PDF..."):
+            extract_future = start_text_extraction(st.session_state.pdf_hash, uploaded_file.getbuffer())
+            if extract_future.done():
                 try:
-                    st.session_state.contract_text = cached_extract_text(temp_pdf_path)
+                    st.session_state.contract_text = extract_future.result()
                     logger.info("✓ PDF text extraction successful")
-                    st.rerun()
                 except Exception as e:
                     logger.error(f"PDF extraction failed: {e}")
+                    discard_text_extraction(st.session_state.pdf_hash)
                     st.error(f"Failed to extract text from PDF: {str(e)}")
                     st.stop()
+            else:
+                render_extraction_status(extract_future)
     
-        # Step 1: Identify contract type
-        if st.session_state.contract_type_info is None:
-            st.markdown("### Step 1: Identify Contract Type")
-            st.info("Click below to identify what type of contract this is.")
-            if st.button("Identify Contract Type", type="primary"):
-                with st.spinner("Analyzing contract type..."):
-                    try:
-                        type_info = identify_contract_type(st.session_state.contract_text)
-                        st.session_state.contract_type_info = type_info
-                        logger.info(f"✓ Contract type identified: {type_info.get('contract_type')}")
-                        st.rerun()
-                    except ValueError as e:
-                        st.error(f"Validation error: {str(e)}")
-                        logger.error(f"Contract type identification validation failed: {e}")
-                    except Exception as e:
-                        st.error(f"Failed to identify contract type: {str(e)}")
-                        logger.error(f"Contract type identification failed: {e}")
-
-        # Display contract type if identified
+        # Single form dispatching to whichever steps are still pending. On success the
+        # form slot is cleared and the results render below in the same run (no st.rerun)
+        type_pending = st.session_state.contract_type_info is None
+        analysis_pending = st.session_state.extracted_data is None
+        if st.session_state.contract_text is not None and (type_pending or analysis_pending):
+            action_slot = st.empty()
+            with action_slot.container():
+                if type_pending and analysis_pending:
+                    st.info("PDF uploaded successfully! Run the analysis to identify the contract type and apply ASC 606.")
+                    spinner_text = "Identifying contract type and analyzing contract... This may take 10-20 seconds"
+                elif type_pending:
+                    st.info("Run the analysis to identify what type of contract this is.")
+                    spinner_text = "Analyzing contract type..."
+                else:
+                    st.info("Run the analysis to apply ASC 606 to this contract.")
+                    spinner_text = "Analyzing contract... This may take 10-20 seconds"
+
+                with st.form("analysis_form", border=False):
+                    submitted = st.form_submit_button("Run analysis", type="primary")
+
+                if submitted:
+                    # Show the response as it streams in rather than a bare spinner
+                    stream_slot = st.empty()
+
+                    def on_chunk(text: str) -> None:
+                        stream_slot.code(text, language="json")
+
+                    with st.spinner(spinner_text):
+                        try:
+                            if type_pending and analysis_pending:
+                                type_info, result = extract_identify_and_analyze(
+                                    st.session_state.contract_text, on_chunk=on_chunk
+                                )
+                            elif type_pending:
+                                type_info, result = identify_contract_type(st.session_state.contract_text), None
+                            else:
+                                type_info, result = None, extract_and_analyze_combined(
+                                    st.session_state.contract_text, on_chunk=on_chunk
+                                )
+                            if type_info is not None:
+                                st.session_state.contract_type_info = type_info
+                                logger.info(f"✓ Contract type identified: {type_info.get('contract_type')}")
+                            if result is not None:
+                                st.session_state.extracted_data = result['contract_info']
+                                st.session_state.asc606_analysis = result['asc606_analysis']
+                                logger.info("✓ Contract analysis completed successfully")
+                            action_slot.empty()
+                        except ValueError as e:
+                            stream_slot.empty()
+                            st.error(f"Validation error: {str(e)}")
+                            logger.error(f"Contract analysis validation failed: {e}")
+                        except Exception as e:
+                            stream_slot.empty()
+                            st.error(f"Analysis failed: {str(e)}")
+                            logger.error(f"Contract analysis failed: {e}")
+                            # Show helpful troubleshooting info
+                            with st.expander("Troubleshooting"):
+                                st.write("If analysis continues to fail, try:")
+                                st.write("• Ensuring the PDF contains clear, readable text")
+                                st.write("• Uploading a different PDF file")
+                                st.write("• Checking your internet connection")
+                                st.write("• Verifying your API key is valid")
+
+        # Step 1: Contract type
         if st.session_state.contract_type_info:
             st.markdown("### Step 1: Contract Type")
-            type_info = st.session_state.contract_type_info
-
-            contract_type = type_info.get('contract_type', 'Unknown')
-            confidence = (type_info.get('confidence') or 'low').lower()
-            reasoning = type_info.get('reasoning', 'N/A')
-            indicators = type_info.get('key_indicators') or []
-
-            # Map confidence to pill style
-            pill_class = {
-                'high': 'pill--high',
-                'medium': 'pill--medium',
-                'low': 'pill--low'
-            }.get(confidence, 'pill--low')
-
-            chips_html = ''.join([f"<span class='chip'>{ind}</span>" for ind in indicators])
-            banner_html = f"""
-            <div class="type-banner">
-              <div class="type-row">
-                <div>
-                  <div class="type-value">{contract_type}</div>
-                </div>
-                <div class="pill {pill_class}">{confidence.title()} confidence</div>
-              </div>
-              <div class="type-title">Reasoning</div>
-              <div class="type-reason">{reasoning}</div>
-              {f"<div class='type-title' style='margin-top:8px;'>Key indicators</div><div class='chips'>{chips_html}</div>" if indicators else ''}
-            </div>
-            """
+            type_info = ContractTypeInfo.from_dict(st.session_state.contract_type_info)
+            banner_html = build_type_banner_html(type_info)
             st.markdown(banner_html, unsafe_allow_html=True)
             st.markdown("---")
         
-        # Step 2: Full ASC 606 Analysis
-        st.markdown("### Step 2: ASC 606 Analysis")
-        
-        # Analyze button
-        if st.session_state.extracted_data is None:
-            st.info("PDF uploaded successfully! Click below to analyze the contract.")
-            if st.button("Analyze Contract with AI", type="primary"):
-                with st.spinner("Analyzing contract... This may take 10-20 seconds"):
-                    try:
-                        result = extract_and_analyze_combined(st.session_state.contract_text)
-                        st.session_state.extracted_data = result['contract_info']
-                        st.session_state.asc606_analysis = result['asc606_analysis']
-                        logger.info("✓ Contract analysis completed successfully")
-                        st.success("Analysis complete!")
-                        st.rerun()
-                    except ValueError as e:
-                        st.error(f"Validation error: {str(e)}")
-                        logger.error(f"Contract analysis validation failed: {e}")
-                    except Exception as e:
-                        st.error(f"Analysis failed: {str(e)}")
-                        logger.error(f"Contract analysis failed: {e}")
-                        # Show helpful troubleshooting info
-                        with st.expander("Troubleshooting"):
-                            st.write("If analysis continues to fail, try:")
-                            st.write("• Ensuring the PDF contains clear, readable text")
-                            st.write("• Uploading a different PDF file")
-                            st.write("• Checking your internet connection")
-                            st.write("• Verifying your API key is valid")
-        
-        # Display results in tabs
+        # Step 2: Full ASC 606 Analysis results in tabs
         if st.session_state.extracted_data:
+            st.markdown("### Step 2: ASC 606 Analysis")
 
-            tab1, tab2 = st.tabs(["Contract Details", "ASC 606 Analysis"])
-
-            # Use edited data if available, else extracted
-            data = st.session_state.get('edited_contract_data') or st.session_state.extracted_data
-
-            with tab1:
-                if 'edit_mode' not in st.session_state:
-                    st.session_state.edit_mode = False
-
-                if not st.session_state.edit_mode:
-                    # Display contract details (read-only)
-                    col_a, col_b = st.columns(2)
-                    with col_a:
-                        st.metric("Customer", data.get('customer_name', 'N/A'))
-                        st.metric("Start", data.get('contract_start_date', 'N/A'))
-                        total_value = data.get('total_contract_value', 0)
-                        st.metric("Total Value", _format_currency(total_value))
-                    with col_b:
-                        st.metric("Vendor", data.get('vendor_name', 'N/A'))
-                        st.metric("End", data.get('contract_end_date', 'N/A'))
-                        st.metric("Terms", data.get('payment_terms', 'N/A'))
-
-                    if data.get('performance_obligations'):
-                        st.markdown("**Obligations:**")
-                        for i, po in enumerate(data.get('performance_obligations', []), 1):
-                            st.caption(f"{i}. {po}")
-
-                    obligations = data.get('obligations')
-                    if obligations and isinstance(obligations, list) and len(obligations) > 0:
-                        st.markdown("**Obligation Allocations:**")
-                        obligations_table = []
-                        for idx, ob in enumerate(obligations, 1):
-                            name = ob.get('name', 'N/A')
-                            desc = ob.get('description', '')
-                            value = ob.get('allocated_value', 0)
-                            value_str = _format_currency(value)
-                            obligations_table.append((str(idx), name, desc, value_str))
-                        table_html = """
-                        <table class="obligation-table">
-                            <thead>
-                                <tr>
-                                    <th>#</th>
-                                    <th>Obligation</th>
-                                    <th>Description</th>
-                                    <th>Allocated Value</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                        """
-                        for row in obligations_table:
-                            table_html += f"<tr><td>{row[0]}</td><td>{row[1]}</td><td>{row[2]}</td><td>{row[3]}</td></tr>"
-                        table_html += "</tbody></table>"
-                        st.markdown(table_html, unsafe_allow_html=True)
-
-                    # Edit button
-                    if st.button("Edit Details", key="edit_details_btn"):
-                        st.session_state.edit_mode = True
-                        st.session_state.edited_contract_data = data.copy()
-                        st.rerun()
-
-                else:
-                    # Edit mode: show input fields
-                    edited = st.session_state.get('edited_contract_data', {}).copy()
-                    col_a, col_b = st.columns(2)
-                    with col_a:
-                        edited['customer_name'] = st.text_input("Customer", value=edited.get('customer_name', ''))
-                        edited['contract_start_date'] = st.text_input("Start Date (YYYY-MM-DD)", value=edited.get('contract_start_date', ''))
-                        edited['total_contract_value'] = st.text_input("Total Value", value=str(edited.get('total_contract_value', '')))
-                    with col_b:
-                        edited['vendor_name'] = st.text_input("Vendor", value=edited.get('vendor_name', ''))
-                        edited['contract_end_date'] = st.text_input("End Date (YYYY-MM-DD)", value=edited.get('contract_end_date', ''))
-                        edited['payment_terms'] = st.text_input("Terms", value=edited.get('payment_terms', ''))
-
-                    # Obligations (simple editable list)
-                    st.markdown("**Obligations (comma separated):**")
-                    perf_ob_str = ', '.join(edited.get('performance_obligations', [])) if isinstance(edited.get('performance_obligations', []), list) else ''
-                    perf_ob_str = st.text_input("Performance Obligations", value=perf_ob_str)
-                    edited['performance_obligations'] = [s.strip() for s in perf_ob_str.split(',')] if perf_ob_str else []
-
-                    # Obligations with allocated value (simple table)
-                    obligations = edited.get('obligations', [])
-                    st.markdown("**Obligation Allocations:** (edit below)")
-                    new_obligations = []
-                    for idx, ob in enumerate(obligations, 1):
-                        # Use equal width columns for consistency
-                        cols = st.columns(4)
-                        name = cols[0].text_input(f"Obligation Name {idx}", value=ob.get('name', ''), key=f"ob_name_{idx}")
-                        desc = cols[1].text_input(f"Description {idx}", value=ob.get('description', ''), key=f"ob_desc_{idx}")
-                        value = cols[2].text_input(f"Allocated Value {idx}", value=str(ob.get('allocated_value', '')), key=f"ob_val_{idx}")
-                        # Add a blank column for spacing/alignment if needed
-                        _ = cols[3].markdown("")
-                        new_obligations.append({'name': name, 'description': desc, 'allocated_value': value})
-                    edited['obligations'] = new_obligations
-
-                    # Save and re-run analysis button, plus cancel
-                    run_col, cancel_col = st.columns([2,1])
-                    # Ensure consistent button width with custom CSS
-                    st.markdown("""
-                        <style>
-                        .stButton > button#save_rerun_btn {
-                            min-width: 220px;
-                        }
-                        </style>
-                    """, unsafe_allow_html=True)
-                    with run_col:
-                        if st.button("Save and re-run analysis", key="save_rerun_btn", type="primary"):
-                            st.session_state.edited_contract_data = edited
-                            st.session_state.edit_mode = False
-                            st.session_state.extracted_data = edited
-                            st.session_state.asc606_analysis = None
-                            import json
-                            try:
-                                result = extract_and_analyze_combined(json.dumps(edited))
-                                st.session_state.extracted_data = result['contract_info']
-                                st.session_state.asc606_analysis = result['asc606_analysis']
-                                st.success("Analysis complete with edited details!")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Analysis failed: {str(e)}")
-                    with cancel_col:
-                        if st.button("Cancel", key="cancel_edit_btn"):
-                            st.session_state.edit_mode = False
-                            st.rerun()
-            
-            with tab2:
-                if st.session_state.asc606_analysis:
-                    analysis = st.session_state.asc606_analysis
-                    
-                    # Display each step - more compact
-                    for step_num in range(1, 6):
-                        step_key = f"step_{step_num}"
-                        if step_key in analysis:
-                            with st.expander(f"Step {step_num}: {analysis[step_key].get('title', '')}", expanded=False):
-                                st.caption(analysis[step_key].get('description', ''))
-                                if analysis[step_key].get('details'):
-                                    for detail in analysis[step_key]['details']:
-                                        st.caption(f"• {detail}")
-                
-                    # Revenue schedule
-                    if 'revenue_schedule' in analysis:
-                        st.markdown("---")
-                        st.markdown("**Revenue Schedule**")
-                        schedule_df = pd.DataFrame(analysis['revenue_schedule'])
-                        if len(schedule_df) > 0 and 'error' not in schedule_df.columns:
-                            # Identify obligation-specific columns
-                            obligation_cols = [col for col in schedule_df.columns if col.startswith('revenue_') and col != 'revenue_amount']
-                            
-                            # Show multi-obligation summary if applicable
-                            if obligation_cols:
-                                st.info(f"📊 Multi-obligation contract with {len(obligation_cols)} performance obligations")
-                            
-                            # Reorder columns for better display
-                            base_cols = ['period', 'period_start', 'period_end']
-                            display_cols = base_cols + obligation_cols + ['revenue_amount', 'deferred_revenue']
-                            # Keep only columns that exist
-                            display_cols = [col for col in display_cols if col in schedule_df.columns]
-                            # Add any remaining columns not already included
-                            remaining_cols = [col for col in schedule_df.columns if col not in display_cols]
-                            display_cols.extend(remaining_cols)
-                            
-                            display_df = schedule_df[display_cols].copy()
-                            
-                            # Format currency columns for display
-                            currency_cols = ['revenue_amount', 'deferred_revenue'] + obligation_cols
-                            for col in currency_cols:
-                                if col in display_df.columns:
-                                    display_df[col] = display_df[col].apply(lambda x: f"${x:,.2f}" if isinstance(x, (int, float)) else x)
-                            
-                            # Configure column display settings to ensure all columns are visible
-                            column_config = {}
-                            for col in display_df.columns:
-                                if col.startswith('revenue_'):
-                                    # Make revenue columns more prominent
-                                    column_config[col] = st.column_config.TextColumn(
-                                        col.replace('revenue_', '').replace('_', ' ').title(),
-                                        width="medium",
-                                        help=f"Revenue for {col.replace('revenue_', '')}"
-                                    )
-                                elif col == 'deferred_revenue':
-                                    column_config[col] = st.column_config.TextColumn(
-                                        "Deferred Revenue",
-                                        width="medium"
-                                    )
-                            
-                            # Display the dataframe with all columns and custom config
-                            st.dataframe(
-                                display_df,
-                                use_container_width=True,
-                                hide_index=True,
-                                height=min(400, len(display_df) * 35 + 38),
-                                column_config=column_config
-                            )
-                            
-                            # Download CSV with raw numbers
-                            csv_data = schedule_df.to_csv(index=False).encode('utf-8')
-                            st.download_button(
-                                label="📥 Download Revenue Schedule (CSV)",
-                                data=csv_data,
-                                file_name="revenue_schedule.csv",
-                                mime="text/csv",
-                                use_container_width=True,
-                            )
-                            
-                            # Enhanced visualization
-                            st.markdown("**Revenue Visualization**")
-                            
-                            # Let user choose what to visualize
-                            viz_type = st.radio(
-                                "Visualization type:",
-                                ["Stacked", "Grouped", "Line Chart"],
-                                horizontal=True,
-                                help="Choose how to display revenue data"
-                            )
-                            
-                            # Column selection for visualization
-                            all_revenue_cols = obligation_cols + ['revenue_amount']
-                            default_cols = ['revenue_amount'] if 'revenue_amount' in all_revenue_cols else obligation_cols[:1]
-                            
-                            selected_cols = st.multiselect(
-                                "Select revenue columns to visualize:",
-                                all_revenue_cols,
-                                default=default_cols if obligation_cols else ['revenue_amount']
-                            )
-                            
-                            if selected_cols:
-                                # Create visualization based on type
-                                if viz_type == "Stacked":
-                                    fig = px.bar(
-                                        schedule_df,
-                                        x='period',
-                                        y=selected_cols,
-                                        labels={'period': 'Period', 'value': 'Revenue', 'variable': 'Obligation'},
-                                        title="Revenue Recognition by Period"
-                                    )
-                                    fig.update_layout(
-                                        barmode='stack',
-                                        height=CHART_HEIGHT,
-                                        margin=CHART_MARGIN,
-                                        legend=CHART_LEGEND
-                                    )
-                                    
-                                elif viz_type == "Grouped":
-                                    fig = px.bar(
-                                        schedule_df,
-                                        x='period',
-                                        y=selected_cols,
-                                        labels={'period': 'Period', 'value': 'Revenue', 'variable': 'Obligation'},
-                                        title="Revenue Recognition by Period"
-                                    )
-                                    fig.update_layout(
-                                        barmode='group',
-                                        height=CHART_HEIGHT,
-                                        margin=CHART_MARGIN,
-                                        legend=CHART_LEGEND
-                                    )
-                                    
-                                else:  # Line Chart
-                                    fig = go.Figure()
-                                    for col in selected_cols:
-                                        fig.add_trace(go.Scatter(
-                                            x=schedule_df['period'],
-                                            y=schedule_df[col],
-                                            mode='lines+markers',
-                                            name=col.replace('revenue_', '').replace('_', ' ').title(),
-                                            line=dict(width=3),
-                                            marker=dict(size=8)
-                                        ))
-                                    
-                                    fig.update_layout(
-                                        title="Revenue Recognition Trend",
-                                        xaxis_title="Period",
-                                        yaxis_title="Revenue",
-                                        height=CHART_HEIGHT,
-                                        margin=CHART_MARGIN,
-                                        legend=CHART_LEGEND,
-                                        hovermode='x unified'
-                                    )
-                                
-                                st.plotly_chart(fig, use_container_width=True)
-                                
-                                # Add deferred revenue chart if available
-                                if 'deferred_revenue' in schedule_df.columns:
-                                    with st.expander("View Deferred Revenue", expanded=False):
-                                        fig_deferred = go.Figure()
-                                        fig_deferred.add_trace(go.Scatter(
-                                            x=schedule_df['period'],
-                                            y=schedule_df['deferred_revenue'],
-                                            mode='lines+markers',
-                                            name='Deferred Revenue',
-                                            fill='tozeroy',
-                                            line=dict(color='#FF6B6B', width=3),
-                                            marker=dict(size=8)
-                                        ))
-                                        
-                                        fig_deferred.update_layout(
-                                            title="Deferred Revenue Over Time",
-                                            xaxis_title="Period",
-                                            yaxis_title="Deferred Revenue",
-                                            height=DEFERRED_CHART_HEIGHT,
-                                            margin=CHART_MARGIN,
-                                            hovermode='x unified'
-                                        )
-                                        
-                                        st.plotly_chart(fig_deferred, use_container_width=True)
-                        else:
-                            st.warning("Unable to generate revenue schedule")
-                else:
-                    st.info("Complete the contract analysis to view ASC 606 breakdown")
+            render_results()
     
     # Right column - Document Viewer (always visible when file is uploaded)
     with col_right:
-        # Display PDF using cached function
-        try:
-            pdf_display = get_pdf_display_html(temp_pdf_path)
-            st.markdown(pdf_display, unsafe_allow_html=True)
-        except Exception as e:
-            st.error(f"Error displaying PDF: {str(e)}")
+        render_pdf_viewer(st.session_state.pdf_hash, temp_pdf_path)
 
 else:
+    # The upload was removed; don't leave it in the public static folder
+    if st.session_state.temp_pdf_path:
+        _remove_saved_pdf(st.session_state.temp_pdf_path)
+        st.session_state.temp_pdf_path = None
+
     # No file uploaded - show welcome message in left column only
     with col_left:
         # Welcome message
         st.info("Upload a SaaS contract PDF to begin analysis")
         
         # Quick info cards
-        st.markdown("""
-        **Step 1:** Upload your PDF contract  
-        **Step 2:** AI analyzes the contract  
-        **Step 3:** View ASC 606 compliance
-        """)
+        st.markdown(WELCOME_MD)
         
         st.markdown("---")
         
         with st.expander("About ASC 606 Analysis"):
-            st.markdown("""
-            This tool analyzes SaaS contracts using the **ASC 606 revenue recognition framework**:
-            
-            **The Five-Step Model:**
-            1. Identify the contract with a customer
-            2. Identify performance obligations
-            3. Determine the transaction price
-            4. Allocate the transaction price
-            5. Recognize revenue when obligations are satisfied
-            
-            **What you'll get:**
-            - Automated contract data extraction
-            - Complete ASC 606 compliance analysis
-            - Revenue recognition schedule with multi-obligation support
-            - Interactive visualizations
-            """)
+            st.markdown(ABOUT_MD)
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,59 @@
+"""
+Tests for the app's revenue schedule helpers (the Streamlit script is imported in bare mode)
+"""
+import os
+import unittest
+from unittest import mock
+
+import google.generativeai as genai
+
+from utils.asc606_engine import generate_revenue_schedule
+
+MULTI_OBLIGATION_CONTRACT = {
+    'contract_start_date': '2024-01-01',
+    'contract_end_date': '2024-12-31',
+    'total_contract_value': 150000,
+    'payment_terms': 'monthly',
+    'obligations': [
+        {'name': 'software_license', 'allocated_value': 120000, 'recognition': 'over_time'},
+        {'name': 'implementation', 'allocated_value': 30000, 'recognition': 'point_in_time',
+         'recognition_period': 2},
+    ],
+}
+
+SCHEDULE_COLUMNS = [
+    'period', 'period_start', 'period_end', 'revenue_software_license', 'revenue_implementation',
+    'revenue_amount', 'deferred_revenue', '_reasoning',
+]
+
+app = None
+
+
+def setUpModule():
+    global app
+    # No real Gemini client or network access while the script runs
+    with mock.patch.object(genai, 'GenerativeModel'), mock.patch.object(genai, 'configure'), \
+            mock.patch.dict(os.environ, {'GEMINI_API_KEY': 'AIzaTEST'}):
+        import app as app_module
+    app = app_module
+
+
+class ScheduleColumnOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.analysis = {'revenue_schedule': generate_revenue_schedule(MULTI_OBLIGATION_CONTRACT)}
+        _, self.schedule_json = app._analysis_cache_keys(self.analysis)
+
+    def test_dataframe_keeps_record_column_order(self):
+        self.assertEqual(list(app.build_schedule_df(self.schedule_json).columns), SCHEDULE_COLUMNS)
+
+    def test_csv_header_keeps_record_column_order(self):
+        header = app.schedule_csv_bytes(self.schedule_json).decode('utf-8').splitlines()[0]
+        self.assertEqual(header.split(','), SCHEDULE_COLUMNS)
+
+    def test_obligations_listed_in_contract_order(self):
+        _, obligation_cols, _ = app.prepare_schedule_display(self.schedule_json)
+        self.assertEqual(obligation_cols, ['revenue_software_license', 'revenue_implementation'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Tests for utils.asc606_engine revenue schedule generation
+"""
+import unittest
+from datetime import date, timedelta
+
+from utils.asc606_engine import (
+    generate_revenue_schedule, generate_revenue_schedule_columns, schedule_to_columns
+)
+
+SINGLE_OBLIGATION_CONTRACT = {
+    'contract_start_date': '2024-01-01',
+    'contract_end_date': '2024-12-31',
+    'total_contract_value': 120000,
+    'payment_terms': 'monthly',
+}
+
+MULTI_OBLIGATION_CONTRACT = {
+    'contract_start_date': '2024-01-01',
+    'contract_end_date': '2024-12-31',
+    'total_contract_value': 150000,
+    'payment_terms': 'monthly',
+    'obligations': [
+        {'name': 'software_license', 'allocated_value': 120000, 'recognition': 'over_time'},
+        {'name': 'implementation', 'allocated_value': 30000, 'recognition': 'point_in_time',
+         'recognition_period': 2},
+    ],
+}
+
+# One contract per schedule generator (monthly, quarterly, annual, multi-obligation)
+GENERATOR_CONTRACTS = [
+    SINGLE_OBLIGATION_CONTRACT,
+    {**SINGLE_OBLIGATION_CONTRACT, 'payment_terms': 'quarterly'},
+    {**SINGLE_OBLIGATION_CONTRACT, 'payment_terms': 'annual'},
+    MULTI_OBLIGATION_CONTRACT,
+]
+
+
+class IncludeReasoningTest(unittest.TestCase):
+    def test_reasoning_attached_to_first_period_by_default(self):
+        for index, contract in enumerate(GENERATOR_CONTRACTS):
+            with self.subTest(contract=index):
+                schedule = generate_revenue_schedule(contract)
+                self.assertIn('_reasoning', schedule[0])
+                self.assertTrue(all('_reasoning' not in record for record in schedule[1:]))
+
+    def test_reasoning_omitted_when_disabled(self):
+        for index, contract in enumerate(GENERATOR_CONTRACTS):
+            with self.subTest(contract=index):
+                with_reasoning = generate_revenue_schedule(contract)
+                without_reasoning = generate_revenue_schedule(contract, include_reasoning=False)
+                self.assertTrue(all('_reasoning' not in record for record in without_reasoning))
+                # Everything else is the same schedule
+                for record in with_reasoning:
+                    record.pop('_reasoning', None)
+                self.assertEqual(without_reasoning, with_reasoning)
+
+
+class ScheduleColumnsTest(unittest.TestCase):
+    def assertColumnsMatchRecords(self, columns, records):
+        self.assertEqual(list(columns), list(dict.fromkeys(key for record in records for key in record)))
+        for key, values in columns.items():
+            self.assertEqual(values, [record.get(key) for record in records])
+
+    def test_single_obligation(self):
+        records = generate_revenue_schedule(SINGLE_OBLIGATION_CONTRACT)
+        columns = generate_revenue_schedule_columns(SINGLE_OBLIGATION_CONTRACT)
+        self.assertColumnsMatchRecords(columns, records)
+        # _reasoning only exists on the first period and is None-filled elsewhere
+        self.assertIsNotNone(columns['_reasoning'][0])
+        self.assertEqual(columns['_reasoning'][1:], [None] * (len(records) - 1))
+
+    def test_multi_obligation(self):
+        records = generate_revenue_schedule(MULTI_OBLIGATION_CONTRACT)
+        columns = generate_revenue_schedule_columns(MULTI_OBLIGATION_CONTRACT)
+        self.assertColumnsMatchRecords(columns, records)
+        self.assertEqual(list(columns), [
+            'period', 'period_start', 'period_end', 'revenue_software_license',
+            'revenue_implementation', 'revenue_amount', 'deferred_revenue', '_reasoning',
+        ])
+
+    def test_error_schedule(self):
+        invalid_contract = {**SINGLE_OBLIGATION_CONTRACT, 'total_contract_value': -5}
+        records = generate_revenue_schedule(invalid_contract)
+        columns = generate_revenue_schedule_columns(invalid_contract)
+        self.assertEqual(records[0]['period'], 'Error')
+        self.assertColumnsMatchRecords(columns, records)
+
+    def test_missing_dates_schedule(self):
+        undated_contract = {**SINGLE_OBLIGATION_CONTRACT, 'contract_end_date': 'Unable to identify'}
+        records = generate_revenue_schedule(undated_contract)
+        self.assertColumnsMatchRecords(generate_revenue_schedule_columns(undated_contract), records)
+
+    def test_schedule_to_columns_fills_missing_fields(self):
+        records = [{'a': 1, 'b': 2}, {'a': 3, 'c': 4}]
+        self.assertEqual(schedule_to_columns(records), {'a': [1, 3], 'b': [2, None], 'c': [None, 4]})
+        self.assertEqual(schedule_to_columns([]), {})
+
+
+class MonthEndPeriodTest(unittest.TestCase):
+    """Periods for contracts starting on days 29-31 stay anchored to the start day."""
+
+    def assertContiguous(self, schedule):
+        for previous, current in zip(schedule, schedule[1:]):
+            self.assertEqual(date.fromisoformat(current['period_start']),
+                             date.fromisoformat(previous['period_end']) + timedelta(days=1))
+
+    def test_january_31_start(self):
+        schedule = generate_revenue_schedule({
+            'contract_start_date': '2024-01-31',
+            'contract_end_date': '2024-06-30',
+            'total_contract_value': 6000,
+            'payment_terms': 'monthly',
+        })
+        self.assertEqual([record['period_start'] for record in schedule],
+                         ['2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30', '2024-05-31'])
+        self.assertEqual([record['period_end'] for record in schedule],
+                         ['2024-02-28', '2024-03-30', '2024-04-29', '2024-05-30', '2024-06-29'])
+        self.assertEqual([record['revenue_amount'] for record in schedule], [1200.0] * 5)
+        self.assertEqual([record['deferred_revenue'] for record in schedule],
+                         [4800.0, 3600.0, 2400.0, 1200.0, 0.0])
+        self.assertContiguous(schedule)
+
+    def test_leap_day_start(self):
+        schedule = generate_revenue_schedule({
+            'contract_start_date': '2024-02-29',
+            'contract_end_date': '2025-02-28',
+            'total_contract_value': 12000,
+            'payment_terms': 'monthly',
+        })
+        self.assertEqual(len(schedule), 12)
+        self.assertEqual(schedule[0]['period_start'], '2024-02-29')
+        self.assertEqual(schedule[0]['period_end'], '2024-03-28')
+        self.assertEqual(schedule[-1]['period_start'], '2025-01-29')
+        self.assertEqual(schedule[-1]['period_end'], '2025-02-27')
+        self.assertEqual([record['revenue_amount'] for record in schedule], [1000.0] * 12)
+        self.assertEqual([record['deferred_revenue'] for record in schedule],
+                         [float(12000 - 1000 * n) for n in range(1, 13)])
+        self.assertContiguous(schedule)
+
+    def test_quarterly_month_end_start(self):
+        schedule = generate_revenue_schedule({
+            'contract_start_date': '2024-01-31',
+            'contract_end_date': '2024-12-30',
+            'total_contract_value': 12000,
+            'payment_terms': 'quarterly',
+        })
+        self.assertEqual(len(schedule), 11)
+        self.assertEqual([record['period_start'] for record in schedule[:4]],
+                         ['2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30'])
+        self.assertEqual([record['revenue_amount'] for record in schedule], [1090.91] * 11)
+        self.assertEqual(schedule[-1]['deferred_revenue'], 0.0)
+        self.assertContiguous(schedule)
+
+
+if __name__ == '__main__':
+    unittest.main()
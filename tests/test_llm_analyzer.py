@@ -0,0 +1,112 @@
+"""
+Tests for utils.llm_analyzer input validation (no Gemini API calls are made)
+"""
+import json
+import unittest
+from unittest import mock
+
+from utils import llm_analyzer
+
+EDITED_CONTRACT = {
+    'customer_name': 'Acme Corp',
+    'vendor_name': 'Vendor Inc',
+    'contract_start_date': '2024-01-01',
+    'contract_end_date': '2024-12-31',
+    'total_contract_value': 120000,
+    'payment_terms': 'monthly',
+    'performance_obligations': ['software_license', 'implementation'],
+    'obligations': [
+        {'name': 'software_license', 'description': 'SaaS platform access', 'allocated_value': 100000},
+        {'name': 'implementation', 'description': 'Onboarding and setup', 'allocated_value': 20000},
+    ],
+}
+
+GEMINI_RESPONSE = json.dumps({
+    'contract_info': EDITED_CONTRACT,
+    'asc606_analysis': {
+        f'step_{i}': {'title': f'Step {i}', 'description': 'Analysis', 'details': ['point']}
+        for i in range(1, 6)
+    },
+})
+
+
+class ExtractAndAnalyzeCombinedTest(unittest.TestCase):
+    def test_serialized_contract_dict_is_analyzed(self):
+        # The edit form re-runs the analysis on the edited details serialized as JSON
+        contract_json = json.dumps(EDITED_CONTRACT)
+        with mock.patch.object(llm_analyzer, '_make_gemini_request',
+                               return_value=GEMINI_RESPONSE) as request:
+            result = llm_analyzer.extract_and_analyze_combined(contract_json, check_prose=False)
+
+        request.assert_called_once()
+        self.assertIn(contract_json, request.call_args.args[0])
+        self.assertEqual(result['contract_info']['customer_name'], 'Acme Corp')
+        self.assertEqual(len(result['asc606_analysis']['revenue_schedule']), 12)
+
+    def test_garbled_text_is_rejected_before_api_call(self):
+        garbled = "|| 3l ;; @@ 0x9 ~~ 1 2 3 ... " * 20
+        with mock.patch.object(llm_analyzer, '_make_gemini_request') as request:
+            with self.assertRaises(ValueError):
+                llm_analyzer.extract_and_analyze_combined(garbled)
+        request.assert_not_called()
+
+
+class ValidateContractTextTest(unittest.TestCase):
+    def test_non_english_contract_is_accepted(self):
+        german = ("Dieser Vertrag wird zwischen der Acme GmbH und dem Kunden geschlossen. "
+                  "Die Laufzeit beträgt zwölf Monate ab dem Datum des Inkrafttretens. ") * 10
+        llm_analyzer.validate_contract_text(german)
+
+    def test_table_first_contract_is_accepted(self):
+        pricing_table = "| Year | Period | Annual Fee |\n" + \
+            "| 1 | 2024-01-01 to 2024-12-31 | $120,000.00 |\n" * 100
+        llm_analyzer.validate_contract_text(
+            pricing_table + "This agreement is entered into by the customer and the vendor."
+        )
+
+    def test_symbol_noise_is_rejected_with_ocr_hint(self):
+        with self.assertRaisesRegex(ValueError, "OCR"):
+            llm_analyzer.validate_contract_text("~ ' . , ; : ` ^ ° • ■ □ ¦ ¬ | " * 20)
+
+
+class PreclassifyContractTypeTest(unittest.TestCase):
+    def test_pattern_table(self):
+        cases = [
+            ("The subscription term is 12 months and subscription fees are billed monthly.",
+             'SaaS Subscription'),
+            ("Services are described in each Statement of Work. Professional services are billed hourly.",
+             'Professional Services'),
+            ("Vendor grants a perpetual, non-exclusive licence. The perpetual software license fee is due.",
+             'Perpetual Software License'),
+            ("This equipment purchase ships under a bill of lading.", 'Hardware/Equipment Sale'),
+            ("Maintenance and support is provided. Support services include patches.",
+             'Maintenance & Support'),
+        ]
+        for text, expected in cases:
+            with self.subTest(expected=expected):
+                result = llm_analyzer._preclassify_contract_type(text)
+                self.assertIsNotNone(result)
+                self.assertEqual(result['contract_type'], expected)
+                self.assertEqual(result['confidence'], 'medium')
+                llm_analyzer._validate_contract_type_response(result)
+
+    def test_plural_variants_count_as_one_indicator(self):
+        text = "A subscription fee applies. Subscription fees are billed monthly. Subscription-fees."
+        self.assertIsNone(llm_analyzer._preclassify_contract_type(text))
+
+    def test_keywords_for_several_types_defer_to_gemini(self):
+        text = ("The subscription term is 12 months and subscription fees are billed monthly. "
+                "Implementation services are set out in the statement of work.")
+        self.assertIsNone(llm_analyzer._preclassify_contract_type(text))
+
+    def test_identify_contract_type_skips_request_on_keyword_match(self):
+        text = ("This agreement sets the subscription term and the subscription fees "
+                "payable by the customer to the vendor. ") * 3
+        with mock.patch.object(llm_analyzer, '_make_gemini_request') as request:
+            result = llm_analyzer.identify_contract_type(text)
+        request.assert_not_called()
+        self.assertEqual(result['contract_type'], 'SaaS Subscription')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,35 @@
 """
 Utility module initialization
+
+Submodules are imported on first attribute access (PEP 562), so importing one
+of them doesn't pull in the others' heavy dependencies (PyMuPDF, Gemini SDK).
 """
-from .pdf_extractor import extract_text_from_pdf
-from .llm_analyzer import extract_and_analyze_combined, set_api_key, identify_contract_type
-from .asc606_engine import generate_revenue_schedule
-
-__all__ = [
-    'extract_text_from_pdf',
-    'extract_and_analyze_combined',
-    'set_api_key',
-    'identify_contract_type',
-    'generate_revenue_schedule',
-]
+from importlib import import_module
+
+_LAZY_EXPORTS = {
+    'extract_text_from_pdf': '.pdf_extractor',
+    'extract_and_analyze_combined': '.llm_analyzer',
+    'set_api_key': '.llm_analyzer',
+    'identify_contract_type': '.llm_analyzer',
+    'extract_identify_and_analyze': '.llm_analyzer',
+    'ContractTypeInfo': '.llm_analyzer',
+    'generate_revenue_schedule': '.asc606_engine',
+    'generate_revenue_schedule_columns': '.asc606_engine',
+    'schedule_to_columns': '.asc606_engine',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    # Cache on the package so later lookups bypass __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
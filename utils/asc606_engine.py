@@ -1,7 +1,9 @@
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
+from typing import List, Dict, Any, NamedTuple, Optional, Sequence, Tuple
+from datetime import date
+from functools import lru_cache
+import json
 import logging
+import numpy as np
 
 """
 ASC 606 Revenue Recognition Engine
@@ -10,19 +12,45 @@ Implements the 5-step model for revenue recognition with enhanced error handling
 
 logger = logging.getLogger(__name__)
 
-def _is_valid_yyyy_mm_dd(date_str: str) -> bool:
-    """Validate if a date string is in YYYY-MM-DD format."""
+# Number of distinct contracts whose schedules are kept in memory
+SCHEDULE_CACHE_SIZE = 32
+# Number of distinct date strings whose parse results are kept in memory
+DATE_CACHE_SIZE = 1024
+
+
+class ValidatedContract(NamedTuple):
+    """Contract fields parsed during validation; dates are None when missing or invalid."""
+    start_date: Optional[date]
+    end_date: Optional[date]
+    total_value: float
+    payment_terms: str
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_yyyy_mm_dd(date_str: str) -> Optional[date]:
+    """Parse a YYYY-MM-DD date string, returning None if it is missing or malformed."""
+    if not date_str or date_str in ['Unable to identify', 'N/A']:
+        return None
+    # Canonical zero-padded dates take the C fromisoformat path; the length/dash check
+    # keeps it from accepting the other ISO 8601 shapes it understands
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        try:
+            return date.fromisoformat(date_str)
+        except ValueError:
+            return None
+    # Unpadded dates like 2024-1-5 (which strptime accepted) fall back to split/int
+    parts = date_str.split('-')
+    if (len(parts) != 3 or len(parts[0]) != 4 or len(parts[1]) > 2 or len(parts[2]) > 2
+            or not all(part.isascii() and part.isdigit() for part in parts)):
+        return None
     try:
-        if not date_str or date_str in ['Unable to identify', 'N/A']:
-            return False
-        datetime.strptime(date_str, '%Y-%m-%d')
-        return True
-    except Exception:
-        return False
+        return date(*map(int, parts))
+    except ValueError:
+        return None
 
 
-def validate_contract_data(contract_data: Dict[str, Any]) -> None:
-    """Validate contract data before generating revenue schedule."""
+def validate_contract_data(contract_data: Dict[str, Any]) -> ValidatedContract:
+    """Validate contract data before generating revenue schedule, returning the parsed fields."""
     required_fields = ['contract_start_date', 'contract_end_date', 'total_contract_value', 'payment_terms']
     
     for field in required_fields:
@@ -39,31 +67,35 @@ def validate_contract_data(contract_data: Dict[str, Any]) -> None:
             if not contract_data[field] or str(contract_data[field]).strip() == '':
                 raise ValueError(f"Field '{field}' cannot be empty")
     
+    # Validate contract value first; it is cheaper than parsing the dates
+    try:
+        total_value = float(contract_data['total_contract_value'])
+        if total_value <= 0:
+            raise ValueError("Contract value must be greater than 0")
+    except (ValueError, TypeError):
+        raise ValueError("Invalid contract value. Must be a positive number")
+
     # Validate dates only if both are present and in valid format
     start_date_str = str(contract_data.get('contract_start_date', '')).strip()
     end_date_str = str(contract_data.get('contract_end_date', '')).strip()
 
-    if _is_valid_yyyy_mm_dd(start_date_str) and _is_valid_yyyy_mm_dd(end_date_str):
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+    start_date = _parse_yyyy_mm_dd(start_date_str)
+    end_date = _parse_yyyy_mm_dd(end_date_str)
+
+    if start_date and end_date:
         if start_date >= end_date:
             raise ValueError("Contract start date must be before end date")
     else:
-        if start_date_str and not _is_valid_yyyy_mm_dd(start_date_str):
+        if start_date_str and not start_date:
             logger.warning(f"Field 'contract_start_date' has invalid format: '{start_date_str}' (expected YYYY-MM-DD)")
-        if end_date_str and not _is_valid_yyyy_mm_dd(end_date_str):
+        if end_date_str and not end_date:
             logger.warning(f"Field 'contract_end_date' has invalid format: '{end_date_str}' (expected YYYY-MM-DD)")
     
-    # Validate contract value
-    try:
-        total_value = float(contract_data['total_contract_value'])
-        if total_value <= 0:
-            raise ValueError("Contract value must be greater than 0")
-    except (ValueError, TypeError):
-        raise ValueError("Invalid contract value. Must be a positive number")
+    payment_terms = str(contract_data['payment_terms']).lower().strip()
+    return ValidatedContract(start_date, end_date, total_value, payment_terms)
 
 
-def calculate_duration_months(start_date: datetime, end_date: datetime) -> int:
+def calculate_duration_months(start_date: date, end_date: date) -> int:
     """Calculate contract duration in months (inclusive)."""
     duration_months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
     if end_date.day >= start_date.day:
@@ -71,16 +103,23 @@ def calculate_duration_months(start_date: datetime, end_date: datetime) -> int:
     return max(1, duration_months)
 
 
-def generate_revenue_schedule(contract_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+def generate_revenue_schedule(
+    contract_data: Dict[str, Any],
+    include_reasoning: bool = True
+) -> List[Dict[str, Any]]:
     """
     Generate revenue recognition schedule based on contract data.
     
     Implements ASC 606 Step 5: Recognize revenue when (or as) 
-    performance obligations are satisfied.
+    performance obligations are satisfied. Results are memoized on the
+    contract data's canonical JSON, so re-analyzing unchanged contract
+    details reuses the previous schedule.
     
     Args:
         contract_data: Extracted contract information with optional 'obligations' list
                       or 'performance_obligations' list (legacy format)
+        include_reasoning: Attach the human-readable '_reasoning' text to the first
+                      period. Callers that discard it can pass False to skip building it.
         
     Returns:
         List of dictionaries containing revenue schedule by period
@@ -88,17 +127,65 @@ def generate_revenue_schedule(contract_data: Dict[str, Any]) -> List[Dict[str, A
     Raises:
         ValueError: If contract data is invalid
     """
+    # Hand out fresh record dicts so callers can't mutate the cached schedule
+    schedule = _cached_revenue_schedule(_contract_cache_key(contract_data), include_reasoning)
+    return [dict(record) for record in schedule]
+
+
+def generate_revenue_schedule_columns(
+    contract_data: Dict[str, Any],
+    include_reasoning: bool = True
+) -> Dict[str, List[Any]]:
+    """
+    Generate the revenue schedule as columns rather than records.
+    
+    Same schedule as generate_revenue_schedule, laid out as one list per field
+    (see schedule_to_columns) so it can be handed straight to a DataFrame.
+    """
+    schedule = _cached_revenue_schedule(_contract_cache_key(contract_data), include_reasoning)
+    return schedule_to_columns(schedule)
+
+
+def schedule_to_columns(schedule: Sequence[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Pivot schedule records into one list per field.
+    
+    Columns appear in first-seen order. Fields a record lacks (e.g. '_reasoning'
+    outside the first period) are filled with None.
+    """
+    keys = list(dict.fromkeys(key for record in schedule for key in record))
+    return {key: [record.get(key) for record in schedule] for key in keys}
+
+
+def _contract_cache_key(contract_data: Dict[str, Any]) -> str:
+    """Canonical JSON of the contract data, used as the schedule cache key."""
+    return json.dumps(contract_data, sort_keys=True, default=str)
+
+
+@lru_cache(maxsize=SCHEDULE_CACHE_SIZE)
+def _cached_revenue_schedule(
+    contract_json: str,
+    include_reasoning: bool
+) -> Tuple[Dict[str, Any], ...]:
+    """Memoized schedule generation keyed on the canonical JSON of the contract data."""
+    return tuple(_generate_revenue_schedule(json.loads(contract_json), include_reasoning))
+
+
+def _generate_revenue_schedule(
+    contract_data: Dict[str, Any],
+    include_reasoning: bool = True
+) -> List[Dict[str, Any]]:
+    """Uncached implementation of generate_revenue_schedule."""
     logger.info("Generating revenue schedule...")
     
     try:
-        validate_contract_data(contract_data)
-        
+        # Validation hands back the parsed fields; dates are None when missing or invalid
+        contract = validate_contract_data(contract_data)
+        start_date, end_date, total_value, payment_terms = contract
 
-        # Check if dates are available and valid
-        start_date_str = str(contract_data.get('contract_start_date', '')).strip()
-        end_date_str = str(contract_data.get('contract_end_date', '')).strip()
-
-        if not _is_valid_yyyy_mm_dd(start_date_str) or not _is_valid_yyyy_mm_dd(end_date_str):
+        if not start_date or not end_date:
+            start_date_str = str(contract_data.get('contract_start_date', '')).strip()
+            end_date_str = str(contract_data.get('contract_end_date', '')).strip()
             logger.warning(f"Invalid or missing contract dates: start='{start_date_str}', end='{end_date_str}' - cannot generate revenue schedule")
             return [{
                 'period': 'Unable to identify',
@@ -109,13 +196,7 @@ def generate_revenue_schedule(contract_data: Dict[str, Any]) -> List[Dict[str, A
                 'note': 'Contract dates missing or invalid format (expected YYYY-MM-DD)'
             }]
 
-        # Parse dates and values
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        total_value = float(contract_data['total_contract_value'])
-        payment_terms = str(contract_data.get('payment_terms', 'monthly')).lower().strip()
-
-        logger.info(f"Contract period: {start_date.date()} to {end_date.date()}")
+        logger.info(f"Contract period: {start_date} to {end_date}")
         logger.info(f"Total value: ${total_value:,.2f}")
         logger.info(f"Payment terms: {payment_terms}")
 
@@ -135,7 +216,7 @@ def generate_revenue_schedule(contract_data: Dict[str, Any]) -> List[Dict[str, A
                 logger.info(f"✓ Processing {len(obligations)} performance obligations")
                 logger.info(f"Obligation details: {obligations}")
                 return _generate_multi_obligation_schedule(
-                    start_date, end_date, obligations, duration_months
+                    start_date, end_date, obligations, duration_months, include_reasoning
                 )
             else:
                 logger.warning("Obligations found but not properly structured, falling back to single obligation")
@@ -144,7 +225,7 @@ def generate_revenue_schedule(contract_data: Dict[str, Any]) -> List[Dict[str, A
 
         # Single obligation - use payment terms
         return _generate_single_obligation_schedule(
-            start_date, end_date, total_value, duration_months, payment_terms
+            start_date, end_date, total_value, duration_months, payment_terms, include_reasoning
         )
         
     except Exception as e:
@@ -159,11 +240,43 @@ def generate_revenue_schedule(contract_data: Dict[str, Any]) -> List[Dict[str, A
         }]
 
 
+def _add_months(start_date: date, offsets: np.ndarray) -> np.ndarray:
+    """
+    Vectorized ``start_date + relativedelta(months=k)`` for every k in offsets.
+    
+    Each result keeps start_date's day of month, clamped to the length of the
+    target month (Jan 31 + 1 month -> Feb 28/29), as datetime64[D].
+    """
+    month_index = (start_date.year - 1970) * 12 + (start_date.month - 1) + offsets
+    month_first = month_index.astype('datetime64[M]').astype('datetime64[D]')
+    next_month_first = (month_index + 1).astype('datetime64[M]').astype('datetime64[D]')
+    days_in_month = (next_month_first - month_first).astype(np.int64)
+    return month_first + (np.minimum(start_date.day, days_in_month) - 1)
+
+
+def _period_bounds(
+    start_date: date,
+    end_date: date,
+    num_periods: int,
+    months_per_period: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Start and end dates (datetime64[D]) of consecutive periods anchored on start_date.
+    
+    Period i runs from start_date + i periods to the day before period i + 1 starts,
+    with the last end clipped to end_date.
+    """
+    bounds = _add_months(start_date, np.arange(num_periods + 1) * months_per_period)
+    period_ends = np.minimum(bounds[1:] - np.timedelta64(1, 'D'), np.datetime64(end_date))
+    return bounds[:-1], period_ends
+
+
 def _generate_multi_obligation_schedule(
-    start_date: datetime,
-    end_date: datetime,
+    start_date: date,
+    end_date: date,
     obligations: List[Dict[str, Any]],
-    duration_months: int
+    duration_months: int,
+    include_reasoning: bool = True
 ) -> List[Dict[str, Any]]:
     """
     Generate revenue schedule for multiple performance obligations.
@@ -173,269 +286,218 @@ def _generate_multi_obligation_schedule(
     - point_in_time: Revenue recognized in specific period
     - upfront: Revenue recognized in first period
     """
-    schedule = []
-    months = [start_date + relativedelta(months=i) for i in range(duration_months)]
-    
-    # Track cumulative recognized revenue per obligation for deferred calculation
-    recognized_by_obligation = [0.0] * len(obligations)
+    # Read each obligation's fields once; the reasoning and revenue matrix below index into these
+    names = [ob.get('name', f'obligation_{ob_idx + 1}') for ob_idx, ob in enumerate(obligations)]
+    values = [float(ob.get('allocated_value', 0)) for ob in obligations]
+    recognitions = [ob.get('recognition', 'over_time').lower() for ob in obligations]
+    recognition_periods = [ob.get('recognition_period', 2) for ob in obligations]
+    revenue_keys = [f"revenue_{ob_name}" for ob_name in names]
     
     # Build reasoning for the schedule
-    reasoning_parts = ["Multi-obligation revenue schedule:"]
-    for ob in obligations:
-        ob_name = ob.get('name', 'unknown')
-        ob_value = float(ob.get('allocated_value', 0))
-        ob_recognition = ob.get('recognition', 'over_time').lower()
-        
+    if include_reasoning:
+        reasoning_parts = ["Multi-obligation revenue schedule:"]
+        for ob_name, ob_value, ob_recognition, recognition_period in zip(names, values, recognitions, recognition_periods):
+            if ob_recognition == 'over_time':
+                monthly_amount = ob_value / duration_months
+                reasoning_parts.append(
+                    f"• {ob_name.replace('_', ' ').title()}: ${ob_value:,.2f} recognized over time "
+                    f"(${monthly_amount:,.2f}/month for {duration_months} months per ASC 606 - "
+                    f"performance obligation satisfied evenly over contract term)"
+                )
+            elif ob_recognition == 'point_in_time':
+                reasoning_parts.append(
+                    f"• {ob_name.replace('_', ' ').title()}: ${ob_value:,.2f} recognized at point in time "
+                    f"(month {recognition_period}) per ASC 606 - performance obligation satisfied upon completion/delivery"
+                )
+            elif ob_recognition == 'upfront':
+                reasoning_parts.append(
+                    f"• {ob_name.replace('_', ' ').title()}: ${ob_value:,.2f} recognized upfront "
+                    f"(month 1) per ASC 606 - performance obligation satisfied immediately"
+                )
+    
+        reasoning = "\n".join(reasoning_parts)
+        logger.info(f"\n{reasoning}\n")
+    
+    # Revenue matrix: one row per obligation, one column per month
+    revenue = np.zeros((len(obligations), duration_months))
+    for ob_idx, (ob_name, ob_value, ob_recognition, recognition_period) in enumerate(
+        zip(names, values, recognitions, recognition_periods)
+    ):
+        # Calculate revenue based on recognition pattern
         if ob_recognition == 'over_time':
-            monthly_amount = ob_value / duration_months
-            reasoning_parts.append(
-                f"• {ob_name.replace('_', ' ').title()}: ${ob_value:,.2f} recognized over time "
-                f"(${monthly_amount:,.2f}/month for {duration_months} months per ASC 606 - "
-                f"performance obligation satisfied evenly over contract term)"
-            )
+            # Recognize evenly over contract duration
+            revenue[ob_idx, :] = round(ob_value / duration_months, 2)
+            
         elif ob_recognition == 'point_in_time':
-            recognition_period = ob.get('recognition_period', 2)
-            reasoning_parts.append(
-                f"• {ob_name.replace('_', ' ').title()}: ${ob_value:,.2f} recognized at point in time "
-                f"(month {recognition_period}) per ASC 606 - performance obligation satisfied upon completion/delivery"
-            )
+            # Recognize in specific period (default: month 2 for implementation)
+            if isinstance(recognition_period, (int, float)) and recognition_period in range(1, duration_months + 1):
+                revenue[ob_idx, int(recognition_period) - 1] = round(ob_value, 2)
+                
         elif ob_recognition == 'upfront':
-            reasoning_parts.append(
-                f"• {ob_name.replace('_', ' ').title()}: ${ob_value:,.2f} recognized upfront "
-                f"(month 1) per ASC 606 - performance obligation satisfied immediately"
-            )
+            # Recognize entirely in first period
+            revenue[ob_idx, 0] = round(ob_value, 2)
+        
+        else:
+            logger.warning(f"Unknown recognition pattern '{ob_recognition}' for {ob_name}, treating as over_time")
+            revenue[ob_idx, :] = round(ob_value / duration_months, 2)
     
-    reasoning = "\n".join(reasoning_parts)
-    logger.info(f"\n{reasoning}\n")
+    # Deferred revenue = sum of (allocated - recognized so far) for all obligations
+    allocated = np.array(values)
+    remaining = allocated[:, None] - np.cumsum(revenue, axis=1)
+    np.maximum(remaining, 0.0, out=remaining)
+    period_totals = np.round(revenue.sum(axis=0), 2)
+    deferred = np.round(remaining.sum(axis=0), 2)
     
-    for month_idx, month_start in enumerate(months):
-        period = month_start.strftime('%Y-%m')
-        period_start = month_start.strftime('%Y-%m-%d')
-        
-        # Calculate period end
-        period_end = month_start + relativedelta(months=1) - timedelta(days=1)
-        if period_end > end_date:
-            period_end = end_date
-        period_end_str = period_end.strftime('%Y-%m-%d')
-        
-        # Initialize period record
+    period_starts, period_ends = _period_bounds(start_date, end_date, duration_months, 1)
+    periods = np.datetime_as_string(period_starts, unit='M').tolist()
+    starts = np.datetime_as_string(period_starts, unit='D').tolist()
+    ends = np.datetime_as_string(period_ends, unit='D').tolist()
+    revenue_rows = revenue.T.tolist()
+    
+    schedule = []
+    for month_idx in range(duration_months):
         period_record = {
-            'period': period,
-            'period_start': period_start,
-            'period_end': period_end_str
+            'period': periods[month_idx],
+            'period_start': starts[month_idx],
+            'period_end': ends[month_idx]
         }
-        
-        period_total_revenue = 0.0
-        
-        # Process each obligation
-        for ob_idx, obligation in enumerate(obligations):
-            ob_name = obligation.get('name', f'obligation_{ob_idx + 1}')
-            ob_value = float(obligation.get('allocated_value', 0))
-            ob_recognition = obligation.get('recognition', 'over_time').lower()
-            
-            revenue_key = f"revenue_{ob_name}"
-            period_revenue = 0.0
-            
-            # Calculate revenue based on recognition pattern
-            if ob_recognition == 'over_time':
-                # Recognize evenly over contract duration
-                period_revenue = round(ob_value / duration_months, 2)
-                
-            elif ob_recognition == 'point_in_time':
-                # Recognize in specific period (default: month 2 for implementation)
-                recognition_period = obligation.get('recognition_period', 2)
-                if (month_idx + 1) == recognition_period:
-                    period_revenue = round(ob_value, 2)
-                    
-            elif ob_recognition == 'upfront':
-                # Recognize entirely in first period
-                if month_idx == 0:
-                    period_revenue = round(ob_value, 2)
-            
-            else:
-                logger.warning(f"Unknown recognition pattern '{ob_recognition}' for {ob_name}, treating as over_time")
-                period_revenue = round(ob_value / duration_months, 2)
-            
-            # Record obligation revenue
-            period_record[revenue_key] = period_revenue
-            recognized_by_obligation[ob_idx] += period_revenue
-            period_total_revenue += period_revenue
-        
-        # Calculate total revenue and deferred revenue for period
-        period_record['revenue_amount'] = round(period_total_revenue, 2)
-        
-        # Deferred revenue = sum of (allocated - recognized so far) for all obligations
-        total_deferred = sum(
-            max(0, float(ob['allocated_value']) - recognized_by_obligation[idx])
-            for idx, ob in enumerate(obligations)
-        )
-        period_record['deferred_revenue'] = round(total_deferred, 2)
-        
-        # Add reasoning to first period only
-        if month_idx == 0:
-            period_record['_reasoning'] = reasoning
-        
+        period_record.update(zip(revenue_keys, revenue_rows[month_idx]))
+        period_record['revenue_amount'] = period_totals[month_idx].item()
+        period_record['deferred_revenue'] = deferred[month_idx].item()
         schedule.append(period_record)
     
+    # Add reasoning to first period only
+    if include_reasoning:
+        schedule[0]['_reasoning'] = reasoning
     return schedule
 
 
 def _generate_single_obligation_schedule(
-    start_date: datetime,
-    end_date: datetime,
+    start_date: date,
+    end_date: date,
     total_value: float,
     duration_months: int,
-    payment_terms: str
+    payment_terms: str,
+    include_reasoning: bool = True
 ) -> List[Dict[str, Any]]:
     """Generate revenue schedule for single obligation based on payment terms."""
     
     # Always use monthly schedule regardless of payment terms
     logger.info(f"Using monthly recognition: ${total_value:,.2f} recognized over {duration_months} months (${total_value/duration_months:,.2f}/month)")
-    return _generate_monthly_schedule(start_date, end_date, total_value, duration_months)
+    return _generate_monthly_schedule(start_date, end_date, total_value, duration_months, include_reasoning)
+
+
+def _even_schedule_records(
+    periods: List[str],
+    period_starts: np.ndarray,
+    period_ends: np.ndarray,
+    total_value: float,
+    period_revenue: float,
+    reasoning: Optional[str]
+) -> List[Dict[str, Any]]:
+    """Build records for a schedule recognizing the same amount every period."""
+    remaining_value = total_value - period_revenue * np.arange(1, len(periods) + 1)
+    # Clip and round in place rather than allocating a new array per step
+    np.maximum(remaining_value, 0.0, out=remaining_value)
+    deferred = np.round(remaining_value, 2, out=remaining_value).tolist()
+    starts = np.datetime_as_string(period_starts, unit='D').tolist()
+    ends = np.datetime_as_string(period_ends, unit='D').tolist()
+    
+    schedule = [
+        {
+            'period': period,
+            'period_start': period_start,
+            'period_end': period_end,
+            'revenue_amount': period_revenue,
+            'deferred_revenue': deferred_revenue
+        }
+        for period, period_start, period_end, deferred_revenue in zip(periods, starts, ends, deferred)
+    ]
+    
+    # Add reasoning to first period
+    if reasoning is not None:
+        schedule[0]['_reasoning'] = reasoning
+    return schedule
 
 
 def _generate_monthly_schedule(
-    start_date: datetime,
-    end_date: datetime,
+    start_date: date,
+    end_date: date,
     total_value: float,
-    duration_months: int
+    duration_months: int,
+    include_reasoning: bool = True
 ) -> List[Dict[str, Any]]:
     """Generate monthly revenue schedule."""
     logger.debug("Generating monthly revenue schedule")
-    schedule = []
     monthly_revenue = round(total_value / duration_months, 2)
     
-    reasoning = (
-        f"Single obligation recognized over time per ASC 606:\n"
-        f"• Total contract value: ${total_value:,.2f}\n"
-        f"• Contract duration: {duration_months} months\n"
-        f"• Monthly revenue: ${monthly_revenue:,.2f} (${total_value:,.2f} ÷ {duration_months} months)\n"
-        f"• Recognition pattern: Revenue recognized evenly as performance obligation is satisfied over contract term"
-    )
-    
-    current_date = start_date
-    for month in range(duration_months):
-        period_end = current_date + relativedelta(months=1) - timedelta(days=1)
-        if period_end > end_date:
-            period_end = end_date
-        
-        remaining_value = total_value - (monthly_revenue * (month + 1))
-        
-        record = {
-            'period': current_date.strftime('%Y-%m'),
-            'period_start': current_date.strftime('%Y-%m-%d'),
-            'period_end': period_end.strftime('%Y-%m-%d'),
-            'revenue_amount': monthly_revenue,
-            'deferred_revenue': round(max(0, remaining_value), 2)
-        }
-        
-        # Add reasoning to first period
-        if month == 0:
-            record['_reasoning'] = reasoning
-        
-        schedule.append(record)
-        
-        current_date += relativedelta(months=1)
-        if current_date > end_date:
-            break
+    reasoning = None
+    if include_reasoning:
+        reasoning = (
+            f"Single obligation recognized over time per ASC 606:\n"
+            f"• Total contract value: ${total_value:,.2f}\n"
+            f"• Contract duration: {duration_months} months\n"
+            f"• Monthly revenue: ${monthly_revenue:,.2f} (${total_value:,.2f} ÷ {duration_months} months)\n"
+            f"• Recognition pattern: Revenue recognized evenly as performance obligation is satisfied over contract term"
+        )
     
-    return schedule
+    period_starts, period_ends = _period_bounds(start_date, end_date, duration_months, 1)
+    periods = np.datetime_as_string(period_starts, unit='M').tolist()
+    return _even_schedule_records(periods, period_starts, period_ends, total_value, monthly_revenue, reasoning)
 
 
 def _generate_annual_schedule(
-    start_date: datetime,
-    end_date: datetime,
+    start_date: date,
+    end_date: date,
     total_value: float,
-    duration_months: int
+    duration_months: int,
+    include_reasoning: bool = True
 ) -> List[Dict[str, Any]]:
     """Generate annual revenue schedule."""
     logger.debug("Generating annual revenue schedule")
-    schedule = []
     years = max(1, duration_months // 12)
     annual_revenue = round(total_value / years, 2)
     
-    reasoning = (
-        f"Single obligation recognized over time per ASC 606:\n"
-        f"• Total contract value: ${total_value:,.2f}\n"
-        f"• Contract duration: {years} year(s)\n"
-        f"• Annual revenue: ${annual_revenue:,.2f} (${total_value:,.2f} ÷ {years} years)\n"
-        f"• Recognition pattern: Revenue recognized annually as performance obligation is satisfied over contract term"
-    )
-    
-    current_date = start_date
-    for year in range(years):
-        period_end = current_date + relativedelta(years=1) - timedelta(days=1)
-        if period_end > end_date:
-            period_end = end_date
-        
-        remaining_value = total_value - (annual_revenue * (year + 1))
-        
-        record = {
-            'period': current_date.strftime('%Y'),
-            'period_start': current_date.strftime('%Y-%m-%d'),
-            'period_end': period_end.strftime('%Y-%m-%d'),
-            'revenue_amount': annual_revenue,
-            'deferred_revenue': round(max(0, remaining_value), 2)
-        }
-        
-        # Add reasoning to first period
-        if year == 0:
-            record['_reasoning'] = reasoning
-        
-        schedule.append(record)
-        
-        current_date += relativedelta(years=1)
-        if current_date > end_date:
-            break
+    reasoning = None
+    if include_reasoning:
+        reasoning = (
+            f"Single obligation recognized over time per ASC 606:\n"
+            f"• Total contract value: ${total_value:,.2f}\n"
+            f"• Contract duration: {years} year(s)\n"
+            f"• Annual revenue: ${annual_revenue:,.2f} (${total_value:,.2f} ÷ {years} years)\n"
+            f"• Recognition pattern: Revenue recognized annually as performance obligation is satisfied over contract term"
+        )
     
-    return schedule
+    period_starts, period_ends = _period_bounds(start_date, end_date, years, 12)
+    periods = np.datetime_as_string(period_starts, unit='Y').tolist()
+    return _even_schedule_records(periods, period_starts, period_ends, total_value, annual_revenue, reasoning)
 
 
 def _generate_quarterly_schedule(
-    start_date: datetime,
-    end_date: datetime,
+    start_date: date,
+    end_date: date,
     total_value: float,
-    duration_months: int
+    duration_months: int,
+    include_reasoning: bool = True
 ) -> List[Dict[str, Any]]:
     """Generate quarterly revenue schedule."""
     logger.debug("Generating quarterly revenue schedule")
-    schedule = []
     quarters = max(1, duration_months // 3)
     quarterly_revenue = round(total_value / quarters, 2)
     
-    reasoning = (
-        f"Single obligation recognized over time per ASC 606:\n"
-        f"• Total contract value: ${total_value:,.2f}\n"
-        f"• Contract duration: {quarters} quarter(s)\n"
-        f"• Quarterly revenue: ${quarterly_revenue:,.2f} (${total_value:,.2f} ÷ {quarters} quarters)\n"
-        f"• Recognition pattern: Revenue recognized quarterly as performance obligation is satisfied over contract term"
-    )
-    
-    current_date = start_date
-    for quarter in range(quarters):
-        period_end = current_date + relativedelta(months=3) - timedelta(days=1)
-        if period_end > end_date:
-            period_end = end_date
-        
-        remaining_value = total_value - (quarterly_revenue * (quarter + 1))
-        quarter_num = (current_date.month - 1) // 3 + 1
-        
-        record = {
-            'period': f"{current_date.strftime('%Y')}-Q{quarter_num}",
-            'period_start': current_date.strftime('%Y-%m-%d'),
-            'period_end': period_end.strftime('%Y-%m-%d'),
-            'revenue_amount': quarterly_revenue,
-            'deferred_revenue': round(max(0, remaining_value), 2)
-        }
-        
-        # Add reasoning to first period
-        if quarter == 0:
-            record['_reasoning'] = reasoning
-        
-        schedule.append(record)
-        
-        current_date += relativedelta(months=3)
-        if current_date > end_date:
-            break
+    reasoning = None
+    if include_reasoning:
+        reasoning = (
+            f"Single obligation recognized over time per ASC 606:\n"
+            f"• Total contract value: ${total_value:,.2f}\n"
+            f"• Contract duration: {quarters} quarter(s)\n"
+            f"• Quarterly revenue: ${quarterly_revenue:,.2f} (${total_value:,.2f} ÷ {quarters} quarters)\n"
+            f"• Recognition pattern: Revenue recognized quarterly as performance obligation is satisfied over contract term"
+        )
     
-    return schedule
\ No newline at end of file
+    period_starts, period_ends = _period_bounds(start_date, end_date, quarters, 3)
+    month_index = period_starts.astype('datetime64[M]').astype(np.int64)
+    years = (month_index // 12 + 1970).tolist()
+    quarter_nums = (month_index % 12 // 3 + 1).tolist()
+    periods = [f"{year}-Q{quarter_num}" for year, quarter_num in zip(years, quarter_nums)]
+    return _even_schedule_records(periods, period_starts, period_ends, total_value, quarterly_revenue, reasoning)
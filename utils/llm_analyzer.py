@@ -3,11 +3,19 @@ LLM interaction using Google Gemini API for contract analysis
 Enhanced with multi-obligation support for ASC 606 compliance
 """
 import google.generativeai as genai
+import hashlib
 import json
-from typing import Dict, Any, Optional
+import os
+import re
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
 import logging
+import threading
 import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date
 from functools import wraps
+from pathlib import Path
 
 # Configure logging to show LLM interactions in terminal
 logging.basicConfig(
@@ -17,101 +25,65 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Constants
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
 MAX_RETRIES = 3
-RATE_LIMIT_DELAY = 1  # seconds between API calls
+# Sliding-window rate limit: at most RATE_LIMIT_CALLS request starts per RATE_LIMIT_WINDOW
+# seconds. Same 1 call/s average as a fixed 1s delay, but back-to-back calls (the classification
+# fallback right after an analysis, or several sessions at once) don't each wait a second.
+RATE_LIMIT_CALLS = 4
+RATE_LIMIT_WINDOW = 4.0
+RESPONSE_CACHE_DIR = Path(__file__).resolve().parent.parent / ".gemini_cache"
+RESPONSE_CACHE_TTL = 7 * 24 * 3600  # seconds a cached Gemini response stays valid
 CONTRACT_EXCERPT_LIMIT = 8000
 ANALYSIS_EXCERPT_LIMIT = 12000
+# Readable-text check run before any API call, to reject garbled/OCR-fragment text early.
+# Letters and digits in any script count, so non-English contracts and pricing tables pass.
+PROSE_SAMPLE_CHARS = 4000
+MIN_ALNUM_RATIO = 0.6  # share of non-whitespace characters that are letters or digits
+CONTRACT_TYPES = [
+    'SaaS Subscription', 'Professional Services', 'Perpetual Software License',
+    'Hybrid', 'Hardware/Equipment Sale', 'Maintenance & Support', 'Other'
+]
 
-# Configure Gemini API (will be set from Streamlit app)
-_api_key: Optional[str] = None
-_last_api_call: float = 0
-
-def rate_limit(func):
-    """Decorator to enforce rate limiting between API calls."""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        global _last_api_call
-        elapsed = time.time() - _last_api_call
-        if elapsed < RATE_LIMIT_DELAY:
-            time.sleep(RATE_LIMIT_DELAY - elapsed)
-        result = func(*args, **kwargs)
-        _last_api_call = time.time()
-        return result
-    return wrapper
-
+# Extra schema/rules spliced into the combined prompt when classification is batched in
+_CLASSIFICATION_SCHEMA = """    "contract_classification": {
+        "contract_type": "the primary contract type from the list below",
+        "confidence": "high/medium/low",
+        "reasoning": "2-3 sentence explanation of why this is the identified type",
+        "key_indicators": ["indicator 1", "indicator 2", "indicator 3"]
+    },
+"""
+_CLASSIFICATION_RULES = f"""CONTRACT CLASSIFICATION RULES:
 
-def validate_contract_text(contract_text: str) -> None:
-    """Validate contract text input."""
-    if not contract_text or not contract_text.strip():
-        raise ValueError("Contract text cannot be empty")
-    
-    if len(contract_text.strip()) < 100:
-        raise ValueError("Contract text appears too short to analyze (minimum 100 characters)")
+1. contract_type must be exactly one of: {', '.join(CONTRACT_TYPES)}
+2. confidence must be exactly "high", "medium", or "low"
+3. reasoning must be 2-3 complete sentences
+4. key_indicators must be an array of 1-5 specific text indicators
 
+"""
 
-def set_api_key(api_key: str) -> None:
-    """Set the Gemini API key with validation."""
-    global _api_key
-    if not api_key or not api_key.strip():
-        raise ValueError("API key cannot be empty")
-    if not api_key.startswith('AIza'):
-        logger.warning("API key format may be incorrect (expected to start with 'AIza')")
-    
-    _api_key = api_key.strip()
-    genai.configure(api_key=_api_key)
-    logger.info("✓ Gemini API key configured successfully")
+# Keyword patterns that identify a contract type without an LLM round trip. Used by
+# identify_contract_type only; the fused analysis request classifies in the same call.
+# A contract matching more than one type is left for Gemini to decide.
+_TYPE_PATTERNS = [
+    (re.compile(r'\bsubscription (?:term|fees?|services?|period)\b|\bsoftware[- ]as[- ]a[- ]service\b', re.I),
+     'SaaS Subscription'),
+    (re.compile(r'\bstatement of work\b|\b(?:professional|consulting|implementation) services\b', re.I),
+     'Professional Services'),
+    (re.compile(r'\bperpetual,? (?:non-exclusive )?(?:software )?licen[cs]e\b', re.I),
+     'Perpetual Software License'),
+    (re.compile(r'\b(?:hardware|equipment) (?:purchase|sale)\b|\bbill of lading\b', re.I),
+     'Hardware/Equipment Sale'),
+    (re.compile(r'\bmaintenance (?:and|&) support\b|\bsupport services\b', re.I),
+     'Maintenance & Support'),
+]
+PRECLASSIFY_MIN_INDICATORS = 2  # distinct keyword hits needed to skip the LLM
+# Folds separators, spelling and plurals so "subscription fee"/"subscription fees" count once
+_INDICATOR_SEPARATOR_RE = re.compile(r'[\s,-]+')
+_INDICATOR_PLURAL_RE = re.compile(r'(?<=[a-z]{3})(?<!s)s\b')
 
-@rate_limit
-def _make_gemini_request(prompt: str, max_retries: int = MAX_RETRIES) -> str:
-    """Make a request to Gemini with retry logic."""
-    if not _api_key:
-        raise ValueError("Gemini API key not set. Please configure your API key first.")
-    
-    model = genai.GenerativeModel('gemini-2.0-flash')
-    
-    for attempt in range(max_retries):
-        try:
-            logger.debug(f"API request attempt {attempt + 1}/{max_retries}")
-            response = model.generate_content(prompt)
-            
-            if not response.text or not response.text.strip():
-                raise ValueError("Empty response from Gemini API")
-                
-            return response.text.strip()
-            
-        except Exception as e:
-            logger.warning(f"API attempt {attempt + 1} failed: {str(e)}")
-            if attempt == max_retries - 1:
-                raise
-            time.sleep(1 * (attempt + 1))  # Progressive backoff
-    
-    raise Exception("All API attempts failed")
-
-def identify_contract_type(contract_text: str) -> Dict[str, Any]:
-    """
-    Identify the type of contract and provide reasoning with improved error handling.
-    
-    Args:
-        contract_text: Full text extracted from the contract PDF
-        
-    Returns:
-        Dictionary containing contract type and reasoning
-        
-    Raises:
-        ValueError: If contract text is invalid
-        Exception: If API call fails after retries
-    """
-    validate_contract_text(contract_text)
-    
-    # Limit text for quick analysis
-    contract_excerpt = contract_text[:CONTRACT_EXCERPT_LIMIT]
-    
-    logger.info("=" * 80)
-    logger.info("IDENTIFYING CONTRACT TYPE")
-    logger.info("=" * 80)
-    logger.info(f"Analyzing excerpt: {len(contract_excerpt)} characters")
-    
-    prompt = f"""You are an expert contract analyst. Analyze this contract and identify its type.
+# Prompt templates, filled in with str.format (literal braces are doubled)
+_CONTRACT_TYPE_PROMPT_TMPL = """You are an expert contract analyst. Analyze this contract and identify its type.
 
 Contract Text:
 {contract_excerpt}
@@ -141,158 +113,7 @@ Requirements:
 
 Respond ONLY with valid JSON, no additional text."""
 
-    try:
-        logger.info("Calling Gemini API for contract type identification...")
-        response_text = _make_gemini_request(prompt)
-        
-        logger.info("\n--- CONTRACT TYPE RESPONSE ---")
-        logger.info(response_text[:500] + "..." if len(response_text) > 500 else response_text)
-        logger.info("--- END RESPONSE ---\n")
-        
-        result = _parse_json_from_response(response_text)
-        _validate_contract_type_response(result)
-        
-        logger.info(f"✓ Identified as: {result.get('contract_type', 'Unknown')}")
-        logger.info(f"  Confidence: {result.get('confidence', 'N/A')}")
-        logger.info("=" * 80 + "\n")
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"✗ Error identifying contract type: {str(e)}")
-        # Return structured fallback
-        return {
-            'contract_type': 'Other',
-            'confidence': 'low',
-            'reasoning': f'Could not determine contract type due to analysis error: {str(e)[:100]}',
-            'key_indicators': ['Analysis failed', 'Manual review required']
-        }
-
-
-def _validate_contract_type_response(result: Dict[str, Any]) -> None:
-    """Validate the structure and content of contract type response."""
-    required_fields = ['contract_type', 'confidence', 'reasoning', 'key_indicators']
-    
-    for field in required_fields:
-        if field not in result:
-            raise ValueError(f"Missing required field: {field}")
-    
-    valid_types = [
-        'SaaS Subscription', 'Professional Services', 'Perpetual Software License',
-        'Hybrid', 'Hardware/Equipment Sale', 'Maintenance & Support', 'Other'
-    ]
-    if result['contract_type'] not in valid_types:
-        logger.warning(f"Unexpected contract type: {result['contract_type']}")
-    
-    valid_confidence = ['high', 'medium', 'low']
-    if result['confidence'] not in valid_confidence:
-        logger.warning(f"Invalid confidence level: {result['confidence']}")
-    
-    if not isinstance(result['key_indicators'], list):
-        raise ValueError("key_indicators must be a list")
-
-
-def _parse_json_from_response(response_text: str) -> Dict[str, Any]:
-    """
-    Helper function to parse JSON from LLM response with improved error handling.
-
-    Attempts to extract JSON whether it's wrapped in code fences or returned raw.
-    Raises json.JSONDecodeError if parsing fails.
-    """
-    if not response_text:
-        raise json.JSONDecodeError("Empty response", "", 0)
-    
-    text = response_text.strip()
-    
-    # Try different extraction methods
-    extraction_methods = [
-        # Method 1: JSON code fence
-        lambda t: _extract_between_markers(t, '```json', '```'),
-        # Method 2: Generic code fence
-        lambda t: _extract_between_markers(t, '```', '```'),
-        # Method 3: Curly braces
-        lambda t: _extract_json_object(t),
-        # Method 4: Raw text
-        lambda t: t
-    ]
-    
-    for i, method in enumerate(extraction_methods):
-        try:
-            candidate = method(text)
-            if candidate:
-                parsed = json.loads(candidate)
-                logger.debug(f"Successfully parsed JSON using method {i+1}")
-                return parsed
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.debug(f"JSON parsing method {i+1} failed: {e}")
-            continue
-    
-    # If all methods fail, provide more context
-    raise json.JSONDecodeError(
-        f"Could not parse JSON from response. Response preview: {text[:200]}...",
-        text,
-        0
-    )
-
-
-def _extract_between_markers(text: str, start_marker: str, end_marker: str) -> Optional[str]:
-    """Extract text between two markers."""
-    if start_marker not in text:
-        return None
-    
-    start_idx = text.find(start_marker) + len(start_marker)
-    end_idx = text.find(end_marker, start_idx)
-    
-    if end_idx == -1:
-        return None
-    
-    return text[start_idx:end_idx].strip()
-
-
-def _extract_json_object(text: str) -> Optional[str]:
-    """Extract JSON object from text by finding matching braces."""
-    first_brace = text.find('{')
-    if first_brace == -1:
-        return None
-    
-    brace_count = 0
-    for i, char in enumerate(text[first_brace:], first_brace):
-        if char == '{':
-            brace_count += 1
-        elif char == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                return text[first_brace:i+1]
-    
-    return None
-
-
-def extract_and_analyze_combined(contract_text: str) -> Dict[str, Any]:
-    """
-    Combined extraction and analysis in a single LLM call for better performance.
-    Enhanced with multi-obligation support for proper ASC 606 revenue recognition.
-    
-    Args:
-        contract_text: Full text extracted from the contract PDF
-        
-    Returns:
-        Dictionary containing both extracted data and ASC 606 analysis
-        
-    Raises:
-        ValueError: If contract text is invalid
-        Exception: If analysis fails after retries
-    """
-    validate_contract_text(contract_text)
-    
-    # Limit text to reduce token usage
-    contract_excerpt = contract_text[:ANALYSIS_EXCERPT_LIMIT]
-    
-    logger.info("=" * 80)
-    logger.info("STARTING COMBINED CONTRACT ANALYSIS")
-    logger.info("=" * 80)
-    logger.info(f"Contract excerpt length: {len(contract_excerpt)} characters")
-    
-    prompt = f"""You are an expert contract analyst and accountant specializing in ASC 606 revenue recognition.
+_ANALYSIS_PROMPT_TMPL = """You are an expert contract analyst and accountant specializing in ASC 606 revenue recognition.
 
 Analyze this SaaS contract and provide BOTH contract information extraction AND ASC 606 analysis in a single response.
 
@@ -301,7 +122,7 @@ Contract Text:
 
 Return valid JSON with this EXACT structure:
 {{
-    "contract_info": {{
+{classification_schema}    "contract_info": {{
         "customer_name": "company name of the customer (required)",
         "vendor_name": "company name of the vendor/provider (required)",
         "contract_start_date": "YYYY-MM-DD format - extract the actual start/effective date from the contract",
@@ -428,54 +249,446 @@ VALIDATION CHECKLIST BEFORE RESPONDING:
 
 ASC 606 ANALYSIS RULES:
 
-Respond ONLY with valid JSON, no additional text."""
+{classification_rules}Respond ONLY with valid JSON, no additional text."""
+
+
+
+@dataclass(frozen=True)
+class ContractTypeInfo:
+    """Normalized, hashable view of a contract type identification result."""
+    contract_type: str = 'Unknown'
+    confidence: str = 'low'
+    reasoning: str = 'N/A'
+    key_indicators: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ContractTypeInfo':
+        """Build from the dict returned by identify_contract_type, applying display defaults."""
+        return cls(
+            contract_type=str(data.get('contract_type', cls.contract_type)),
+            confidence=str(data.get('confidence') or cls.confidence).lower(),
+            reasoning=str(data.get('reasoning', cls.reasoning)),
+            key_indicators=tuple(str(ind) for ind in (data.get('key_indicators') or ())),
+        )
+
 
-    logger.info("\n--- PROMPT SENT TO LLM ---")
-    logger.info(prompt[:800] + "..." if len(prompt) > 800 else prompt)
-    logger.info("--- END PROMPT ---\n")
+# Configure Gemini API (will be set from Streamlit app)
+_api_key: Optional[str] = None
+_model: Optional[genai.GenerativeModel] = None
+_call_times: Deque[float] = deque(maxlen=RATE_LIMIT_CALLS)  # reserved start times (monotonic)
+_rate_limit_lock = threading.Lock()
+
+_JSON_DECODER = json.JSONDecoder()
+_CODE_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL)
+
+def _response_cache_path(prompt: str) -> Path:
+    """Content-addressed cache file for a prompt (the model name is part of the key)."""
+    key = hashlib.sha256(f"{GEMINI_MODEL_NAME}\0{prompt}".encode('utf-8')).hexdigest()
+    return RESPONSE_CACHE_DIR / f"{key}.txt"
 
+
+def _read_cached_response(prompt: str) -> Optional[str]:
+    """Return the cached response for prompt, or None if missing or expired."""
+    path = _response_cache_path(prompt)
     try:
-        logger.info("Calling Gemini API (gemini-2.0-flash)...")
-        response_text = _make_gemini_request(prompt)
-        
-        logger.info("\n--- RAW LLM RESPONSE ---")
-        logger.info(response_text[:1000] + "..." if len(response_text) > 1000 else response_text)
-        logger.info("--- END RESPONSE ---\n")
-        
-        logger.info("Parsing JSON response...")
-        result = _parse_json_from_response(response_text)
-        _validate_combined_analysis_response(result)
-        logger.info("✓ JSON parsed and validated successfully")
+        if time.time() - path.stat().st_mtime > RESPONSE_CACHE_TTL:
+            path.unlink()
+            return None
+        return path.read_text(encoding='utf-8')
+    except OSError:
+        return None
+
+
+def _write_cached_response(prompt: str, response_text: str) -> None:
+    """Store a response; failures only cost the cache, never the request."""
+    path = _response_cache_path(prompt)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        RESPONSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _prune_response_cache()
+        tmp_path.write_text(response_text, encoding='utf-8')
+        # Atomic rename so concurrent readers never see a partial file
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache Gemini response: {e}")
+
+
+def _discard_cached_response(prompt: str) -> None:
+    """Drop a cached response that failed parsing/validation so a retry reaches the API."""
+    try:
+        _response_cache_path(prompt).unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Could not remove cached Gemini response: {e}")
+
+
+def _prune_response_cache() -> None:
+    """Delete expired entries; cached responses hold contract details, so don't keep them."""
+    cutoff = time.time() - RESPONSE_CACHE_TTL
+    with os.scandir(RESPONSE_CACHE_DIR) as entries:
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                continue  # raced with another writer/pruner
+
+
+def cache_response(func):
+    """
+    Decorator serving repeat prompts from the on-disk response cache.
+
+    Applied outside rate_limit so cache hits skip the rate limit delay. For
+    streaming calls a hit is delivered to on_chunk in one piece. Callers must
+    _discard_cached_response() a response that fails parsing or validation.
+    """
+    @wraps(func)
+    def wrapper(prompt: str, *args, **kwargs):
+        cached = _read_cached_response(prompt)
+        if cached is not None:
+            logger.info("✓ Using cached Gemini response")
+            on_chunk = kwargs.get('on_chunk')
+            if on_chunk is not None:
+                on_chunk(cached)
+            return cached
+        result = func(prompt, *args, **kwargs)
+        _write_cached_response(prompt, result)
+        return result
+    return wrapper
+
+
+def _reserve_call_slot() -> float:
+    """Reserve the next request start allowed by the rate limit window; returns seconds to wait."""
+    with _rate_limit_lock:
+        now = time.monotonic()
+        start_at = now
+        if len(_call_times) == _call_times.maxlen:
+            start_at = max(now, _call_times[0] + RATE_LIMIT_WINDOW)
+        _call_times.append(start_at)
+        return start_at - now
+
+
+def rate_limit(func):
+    """Decorator to enforce rate limiting between API calls."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        delay = _reserve_call_slot()
+        if delay > 0:
+            time.sleep(delay)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def validate_contract_text(contract_text: str, check_prose: bool = True) -> None:
+    """
+    Validate contract text input.
+    
+    check_prose rejects garbled (e.g. OCR-fragment) text before any API call; pass False
+    for text that isn't PDF-extracted, such as re-serialized contract data.
+    """
+    if not contract_text or not contract_text.strip():
+        raise ValueError("Contract text cannot be empty")
+    
+    if len(contract_text.strip()) < 100:
+        raise ValueError("Contract text appears too short to analyze (minimum 100 characters)")
+    
+    if check_prose and not _looks_like_prose(contract_text):
+        raise ValueError(
+            "Contract text is mostly symbols rather than readable text. "
+            "The PDF may be scanned or image-based and require OCR."
+        )
+
+
+def _looks_like_prose(text: str) -> bool:
+    """Cheap check that the start of the text is mostly letters/digits rather than symbol noise."""
+    visible = [c for c in text[:PROSE_SAMPLE_CHARS] if not c.isspace()]
+    if not visible:
+        return False
+    return sum(c.isalnum() for c in visible) / len(visible) >= MIN_ALNUM_RATIO
+
+
+def set_api_key(api_key: str) -> genai.GenerativeModel:
+    """Set the Gemini API key with validation and return the configured model."""
+    global _api_key, _model
+    if not api_key or not api_key.strip():
+        raise ValueError("API key cannot be empty")
+    if api_key.strip() == _api_key and _model is not None:
+        return _model  # already the active key; nothing to reconfigure
+    if not api_key.startswith('AIza'):
+        logger.warning("API key format may be incorrect (expected to start with 'AIza')")
+    
+    _api_key = api_key.strip()
+    genai.configure(api_key=_api_key)
+    # JSON mode: every prompt here asks for a JSON object, so have Gemini return bare JSON
+    _model = genai.GenerativeModel(
+        GEMINI_MODEL_NAME,
+        generation_config=genai.GenerationConfig(response_mime_type='application/json', temperature=0.0)
+    )
+    logger.info("✓ Gemini API key configured successfully")
+    # Open the connection in the background so the first real request skips DNS/TLS setup
+    threading.Thread(target=_warm_up_connection, args=(_model,), daemon=True).start()
+    return _model
+
+
+def _warm_up_connection(model: genai.GenerativeModel) -> None:
+    """Issue a tiny count_tokens call (no generation cost) to establish the API connection."""
+    try:
+        model.count_tokens("hi")
+        logger.debug("Gemini connection warmed up")
+    except Exception as e:
+        logger.debug(f"Gemini warm-up request failed (ignored): {str(e)}")
+
+@cache_response
+@rate_limit
+def _make_gemini_request(prompt: str, max_retries: int = MAX_RETRIES,
+                         on_chunk: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Make a request to Gemini with retry logic.
+    
+    If on_chunk is given the response is streamed and on_chunk is called with the
+    text accumulated so far after every chunk.
+    """
+    if not _api_key or _model is None:
+        raise ValueError("Gemini API key not set. Please configure your API key first.")
+    
+    for attempt in range(max_retries):
+        try:
+            logger.debug(f"API request attempt {attempt + 1}/{max_retries}")
+            if on_chunk is None:
+                text = _model.generate_content(prompt).text
+            else:
+                text = ""
+                for chunk in _model.generate_content(prompt, stream=True):
+                    text += chunk.text
+                    on_chunk(text)
+            
+            if not text or not text.strip():
+                raise ValueError("Empty response from Gemini API")
+                
+            return text.strip()
+            
+        except Exception as e:
+            logger.warning(f"API attempt {attempt + 1} failed: {str(e)}")
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(1 * (attempt + 1))  # Progressive backoff
+    
+    raise Exception("All API attempts failed")
+
+
+def identify_contract_type(contract_text: str) -> Dict[str, Any]:
+    """
+    Identify the type of contract and provide reasoning with improved error handling.
+    
+    Args:
+        contract_text: Full text extracted from the contract PDF
         
-        logger.info("\n--- EXTRACTED CONTRACT INFO ---")
-        contract_info = result.get('contract_info', {})
-        logger.info(f"Customer: {contract_info.get('customer_name', 'N/A')}")
-        logger.info(f"Vendor: {contract_info.get('vendor_name', 'N/A')}")
-        logger.info(f"Value: ${contract_info.get('total_contract_value', 'N/A')}")
-        logger.info(f"Start: {contract_info.get('contract_start_date', 'N/A')}")
-        logger.info(f"End: {contract_info.get('contract_end_date', 'N/A')}")
+    Returns:
+        Dictionary containing contract type and reasoning
         
-        # Log obligations if present
-        if 'obligations' in contract_info and contract_info['obligations']:
-            logger.info(f"Obligations: {len(contract_info['obligations'])} found")
-            for ob in contract_info['obligations']:
-                logger.info(f"  - {ob.get('name')}: ${ob.get('allocated_value')} ({ob.get('recognition')})")
-        logger.info("--- END CONTRACT INFO ---\n")
+    Raises:
+        ValueError: If contract text is invalid
+        Exception: If API call fails after retries
+    """
+    validate_contract_text(contract_text)
+    type_info = _preclassify_contract_type(contract_text[:CONTRACT_EXCERPT_LIMIT])
+    if type_info is not None:
+        return type_info
+    prompt = _build_contract_type_prompt(contract_text)
+    
+    try:
+        logger.info("Calling Gemini API for contract type identification...")
+        response_text = _make_gemini_request(prompt)
+        return _process_contract_type_response(response_text)
         
-        # Generate revenue schedule
-        logger.info("Generating revenue schedule...")
-        from utils.asc606_engine import generate_revenue_schedule
-        revenue_schedule = generate_revenue_schedule(result['contract_info'])
-        result['asc606_analysis']['revenue_schedule'] = revenue_schedule
-        logger.info(f"✓ Generated {len(revenue_schedule)} revenue periods")
+    except Exception as e:
+        _discard_cached_response(prompt)
+        return _contract_type_fallback(e)
+
+
+def _build_contract_type_prompt(contract_text: str) -> str:
+    """Build the contract type prompt (the caller has already validated the text)."""
+    # Limit text for quick analysis
+    contract_excerpt = contract_text[:CONTRACT_EXCERPT_LIMIT]
+    
+    logger.info("=" * 80)
+    logger.info("IDENTIFYING CONTRACT TYPE")
+    logger.info("=" * 80)
+    logger.info(f"Analyzing excerpt: {len(contract_excerpt)} characters")
+    
+    prompt = _CONTRACT_TYPE_PROMPT_TMPL.format(contract_excerpt=contract_excerpt)
+
+    return prompt
+
+
+def _preclassify_contract_type(contract_excerpt: str) -> Optional[Dict[str, Any]]:
+    """Classify the contract from unambiguous keywords, or return None to defer to Gemini."""
+    hits: Dict[str, List[str]] = {}
+    for pattern, contract_type in _TYPE_PATTERNS:
+        for match in pattern.finditer(contract_excerpt):
+            indicators = hits.setdefault(contract_type, [])
+            phrase = _normalize_indicator(match.group(0))
+            if phrase not in indicators:
+                indicators.append(phrase)
+    
+    if len(hits) != 1:
+        return None
+    contract_type, indicators = next(iter(hits.items()))
+    if len(indicators) < PRECLASSIFY_MIN_INDICATORS:
+        return None
+    
+    logger.info(f"✓ Identified as: {contract_type} (keyword match, Gemini call skipped)")
+    logger.info("=" * 80 + "\n")
+    return {
+        'contract_type': contract_type,
+        'confidence': 'medium',  # keyword evidence only, never 'high'
+        'reasoning': (f"Matched keywords: {', '.join(indicators[:5])}. "
+                      f"No keywords for any other contract type were found."),
+        'key_indicators': indicators[:5],
+    }
+
+
+def _normalize_indicator(phrase: str) -> str:
+    """Canonical form of a matched keyword phrase, used to count distinct indicators."""
+    phrase = _INDICATOR_SEPARATOR_RE.sub(' ', phrase.lower()).replace('licence', 'license')
+    return _INDICATOR_PLURAL_RE.sub('', phrase)
+
+
+def _process_contract_type_response(response_text: str) -> Dict[str, Any]:
+    """Parse and validate the contract type response."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\n--- CONTRACT TYPE RESPONSE ---")
+        logger.info("%s", response_text if len(response_text) <= 500 else response_text[:500] + "...")
+        logger.info("--- END RESPONSE ---\n")
+    
+    result = _parse_json_from_response(response_text)
+    _validate_contract_type_response(result)
+    
+    logger.info(f"✓ Identified as: {result.get('contract_type', 'Unknown')}")
+    logger.info(f"  Confidence: {result.get('confidence', 'N/A')}")
+    logger.info("=" * 80 + "\n")
+    
+    return result
+
+
+def _contract_type_fallback(error: Exception) -> Dict[str, Any]:
+    """Structured fallback returned when contract type identification fails."""
+    logger.error(f"✗ Error identifying contract type: {str(error)}")
+    return {
+        'contract_type': 'Other',
+        'confidence': 'low',
+        'reasoning': f'Could not determine contract type due to analysis error: {str(error)[:100]}',
+        'key_indicators': ['Analysis failed', 'Manual review required']
+    }
+
+
+def _validate_contract_type_response(result: Dict[str, Any]) -> None:
+    """Validate the structure and content of contract type response."""
+    required_fields = ['contract_type', 'confidence', 'reasoning', 'key_indicators']
+    
+    for field in required_fields:
+        if field not in result:
+            raise ValueError(f"Missing required field: {field}")
+    
+    if result['contract_type'] not in CONTRACT_TYPES:
+        logger.warning(f"Unexpected contract type: {result['contract_type']}")
+    
+    valid_confidence = ['high', 'medium', 'low']
+    if result['confidence'] not in valid_confidence:
+        logger.warning(f"Invalid confidence level: {result['confidence']}")
+    
+    if not isinstance(result['key_indicators'], list):
+        raise ValueError("key_indicators must be a list")
+
+
+def _parse_json_from_response(response_text: str) -> Dict[str, Any]:
+    """
+    Helper function to parse JSON from LLM response with improved error handling.
+
+    Attempts to extract JSON whether it's wrapped in code fences or returned raw.
+    Raises json.JSONDecodeError if parsing fails.
+    """
+    if not response_text:
+        raise json.JSONDecodeError("Empty response", "", 0)
+    
+    text = response_text.strip()
+    
+    # Try different extraction methods; each returns the parsed JSON or None.
+    # JSON mode responses parse as raw text; the others cover fenced or chatty output.
+    extraction_methods = [
+        # Method 1: Raw text
+        _JSON_DECODER.decode,
+        # Method 2: Code fence (```json or bare ```)
+        _decode_code_fence,
+        # Method 3: Curly braces
+        _decode_json_object,
+    ]
+    
+    for i, method in enumerate(extraction_methods):
+        try:
+            parsed = method(text)
+            if parsed is not None:
+                logger.debug(f"Successfully parsed JSON using method {i+1}")
+                return parsed
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.debug(f"JSON parsing method {i+1} failed: {e}")
+            continue
+    
+    # If all methods fail, provide more context
+    raise json.JSONDecodeError(
+        f"Could not parse JSON from response. Response preview: {text[:200]}...",
+        text,
+        0
+    )
+
+
+def _decode_code_fence(text: str) -> Optional[Any]:
+    """Parse the contents of the first code fence in text, if there is one."""
+    match = _CODE_FENCE_RE.search(text)
+    if not match or not match.group(1).strip():
+        return None
+    return _JSON_DECODER.decode(match.group(1).strip())
+
+
+def _decode_json_object(text: str) -> Optional[Any]:
+    """Parse the JSON object starting at the first brace in text."""
+    first_brace = text.find('{')
+    if first_brace == -1:
+        return None
+    
+    # raw_decode scans in C and, unlike brace counting, ignores braces inside strings
+    obj, _ = _JSON_DECODER.raw_decode(text, first_brace)
+    return obj
+
+
+def extract_and_analyze_combined(contract_text: str,
+                                 on_chunk: Optional[Callable[[str], None]] = None,
+                                 check_prose: bool = True) -> Dict[str, Any]:
+    """
+    Combined extraction and analysis in a single LLM call for better performance.
+    Enhanced with multi-obligation support for proper ASC 606 revenue recognition.
+    
+    Args:
+        contract_text: Full text extracted from the contract PDF
+        on_chunk: Optional callback receiving the partial response while it streams
+        check_prose: Reject text that doesn't look like readable prose; pass False when
+                     re-running on serialized contract data rather than PDF text
         
-        logger.info("=" * 80)
-        logger.info("ANALYSIS COMPLETE")
-        logger.info("=" * 80 + "\n")
+    Returns:
+        Dictionary containing both extracted data and ASC 606 analysis
         
-        return result
+    Raises:
+        ValueError: If contract text is invalid
+        Exception: If analysis fails after retries
+    """
+    prompt = _build_analysis_prompt(contract_text, check_prose=check_prose)
+
+    try:
+        logger.info(f"Calling Gemini API ({GEMINI_MODEL_NAME})...")
+        response_text = _make_gemini_request(prompt, on_chunk=on_chunk)
+        return _process_analysis_response(response_text)
         
     except Exception as e:
+        _discard_cached_response(prompt)
         logger.error(f"✗ Error during analysis: {str(e)}", exc_info=True)
         raise Exception(f"Combined analysis failed: {str(e)[:200]}...")
 
@@ -492,6 +705,122 @@ Respond ONLY with valid JSON, no additional text."""
         }
         return result
 
+
+def extract_identify_and_analyze(contract_text: str,
+                                 on_chunk: Optional[Callable[[str], None]] = None
+                                 ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Classify, extract and analyze the contract with a single Gemini request.
+    
+    The classification is batched into the combined analysis prompt so the contract
+    excerpt is sent (and billed) once. Falls back to identify_contract_type if the
+    classification block is missing or malformed.
+    
+    Args:
+        contract_text: Full text extracted from the contract PDF
+        on_chunk: Optional callback receiving the partial response while it streams
+        
+    Returns:
+        Tuple of (contract type info, combined analysis result)
+        
+    Raises:
+        ValueError: If contract text is invalid
+        Exception: If analysis fails after retries
+    """
+    prompt = _build_analysis_prompt(contract_text, include_classification=True)
+
+    try:
+        logger.info(f"Calling Gemini API ({GEMINI_MODEL_NAME}, classification + analysis)...")
+        response_text = _make_gemini_request(prompt, on_chunk=on_chunk)
+        result = _process_analysis_response(response_text)
+        
+    except Exception as e:
+        _discard_cached_response(prompt)
+        logger.error(f"✗ Error during analysis: {str(e)}", exc_info=True)
+        raise Exception(f"Combined analysis failed: {str(e)[:200]}...")
+
+    type_info = result.pop('contract_classification', None)
+    try:
+        if not isinstance(type_info, dict):
+            raise ValueError("Missing contract_classification block")
+        _validate_contract_type_response(type_info)
+        logger.info(f"✓ Identified as: {type_info.get('contract_type', 'Unknown')}")
+    except ValueError as e:
+        logger.warning(f"Batched classification unusable ({e}), falling back to separate request")
+        type_info = identify_contract_type(contract_text)
+    
+    return type_info, result
+
+
+def _build_analysis_prompt(contract_text: str, include_classification: bool = False,
+                           check_prose: bool = True) -> str:
+    """Validate the contract text and build the combined extraction/analysis prompt."""
+    validate_contract_text(contract_text, check_prose)
+    classification_schema = _CLASSIFICATION_SCHEMA if include_classification else ""
+    classification_rules = _CLASSIFICATION_RULES if include_classification else ""
+    
+    # Limit text to reduce token usage
+    contract_excerpt = contract_text[:ANALYSIS_EXCERPT_LIMIT]
+    
+    logger.info("=" * 80)
+    logger.info("STARTING COMBINED CONTRACT ANALYSIS")
+    logger.info("=" * 80)
+    logger.info(f"Contract excerpt length: {len(contract_excerpt)} characters")
+    
+    prompt = _ANALYSIS_PROMPT_TMPL.format(
+        contract_excerpt=contract_excerpt,
+        classification_schema=classification_schema,
+        classification_rules=classification_rules,
+    )
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\n--- PROMPT SENT TO LLM ---")
+        logger.info("%s", prompt if len(prompt) <= 800 else prompt[:800] + "...")
+        logger.info("--- END PROMPT ---\n")
+
+    return prompt
+
+
+def _process_analysis_response(response_text: str) -> Dict[str, Any]:
+    """Parse and validate the combined analysis response and attach the revenue schedule."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\n--- RAW LLM RESPONSE ---")
+        logger.info("%s", response_text if len(response_text) <= 1000 else response_text[:1000] + "...")
+        logger.info("--- END RESPONSE ---\n")
+    
+    logger.info("Parsing JSON response...")
+    result = _parse_json_from_response(response_text)
+    _validate_combined_analysis_response(result)
+    logger.info("✓ JSON parsed and validated successfully")
+    
+    logger.info("\n--- EXTRACTED CONTRACT INFO ---")
+    contract_info = result.get('contract_info', {})
+    logger.info(f"Customer: {contract_info.get('customer_name', 'N/A')}")
+    logger.info(f"Vendor: {contract_info.get('vendor_name', 'N/A')}")
+    logger.info(f"Value: ${contract_info.get('total_contract_value', 'N/A')}")
+    logger.info(f"Start: {contract_info.get('contract_start_date', 'N/A')}")
+    logger.info(f"End: {contract_info.get('contract_end_date', 'N/A')}")
+    
+    # Log obligations if present
+    if 'obligations' in contract_info and contract_info['obligations']:
+        logger.info(f"Obligations: {len(contract_info['obligations'])} found")
+        for ob in contract_info['obligations']:
+            logger.info(f"  - {ob.get('name')}: ${ob.get('allocated_value')} ({ob.get('recognition')})")
+    logger.info("--- END CONTRACT INFO ---\n")
+    
+    # Generate revenue schedule
+    logger.info("Generating revenue schedule...")
+    from utils.asc606_engine import generate_revenue_schedule
+    revenue_schedule = generate_revenue_schedule(result['contract_info'])
+    result['asc606_analysis']['revenue_schedule'] = revenue_schedule
+    logger.info(f"✓ Generated {len(revenue_schedule)} revenue periods")
+    
+    logger.info("=" * 80)
+    logger.info("ANALYSIS COMPLETE")
+    logger.info("=" * 80 + "\n")
+    
+    return result
+
 def _validate_combined_analysis_response(result: Dict[str, Any]) -> None:
     """Validate the structure and content of combined analysis response."""
     # Check top-level structure
@@ -570,20 +899,13 @@ def _validate_combined_analysis_response(result: Dict[str, Any]) -> None:
 
 
 def _is_valid_date_format(date_str: str) -> bool:
-    """Check if date string matches YYYY-MM-DD format."""
-    if not date_str or len(date_str) != 10:
+    """Check if date string is a real calendar date in YYYY-MM-DD format."""
+    # The shape check keeps fromisoformat from accepting its other ISO 8601 forms
+    if not date_str or len(date_str) != 10 or date_str[4] != '-' or date_str[7] != '-':
         return False
     
     try:
-        parts = date_str.split('-')
-        if len(parts) != 3:
-            return False
-        
-        year, month, day = parts
-        return (len(year) == 4 and year.isdigit() and 
-                len(month) == 2 and month.isdigit() and
-                len(day) == 2 and day.isdigit() and
-                1 <= int(month) <= 12 and
-                1 <= int(day) <= 31)
-    except (ValueError, AttributeError):
+        date.fromisoformat(date_str)
+        return True
+    except (ValueError, TypeError):
         return False
\ No newline at end of file
@@ -1,11 +1,17 @@
 """
-PDF text extraction utility using pdfplumber with enhanced error handling and validation
+PDF text extraction utility using PyMuPDF (with pdfplumber fallback) with enhanced error handling and validation
 """
-import pdfplumber
-from typing import Optional
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+import io
 import logging
 from pathlib import Path
 
+try:
+    import pymupdf  # C-level MuPDF parser, much faster than pdfminer-based extraction
+except ImportError:
+    pymupdf = None
+    import pdfplumber
+
 logger = logging.getLogger(__name__)
 
 # Constants
@@ -33,12 +39,68 @@ def validate_pdf_file(pdf_path: str) -> None:
         raise ValueError(f"PDF file too large: {file_size_mb:.1f}MB (max: {MAX_FILE_SIZE_MB}MB)")
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+def validate_pdf_bytes(pdf_bytes: Union[bytes, bytearray, memoryview]) -> None:
+    """Validate in-memory PDF content before processing."""
+    if not pdf_bytes:
+        raise ValueError("PDF content is empty")
+    
+    # Like PDF readers, accept the header anywhere in the first 1024 bytes (e.g. after a BOM)
+    if b'%PDF-' not in bytes(pdf_bytes[:1024]):
+        raise ValueError("Content is not a PDF")
+    
+    file_size_mb = len(pdf_bytes) / (1024 * 1024)
+    if file_size_mb > MAX_FILE_SIZE_MB:
+        raise ValueError(f"PDF file too large: {file_size_mb:.1f}MB (max: {MAX_FILE_SIZE_MB}MB)")
+
+
+def _collect_page_text(pages: Sequence[Any], extract: Callable[[Any], str],
+                       max_chars: Optional[int] = None) -> Tuple[List[str], int]:
+    """
+    Extract stripped text from up to MAX_PAGES_TO_PROCESS pages, skipping problematic ones.
+    
+    Stops early once max_chars characters have been collected, if given.
+    """
+    text_content = []
+    pages_processed = 0
+    total_chars = 0
+    total_pages = len(pages)
+    # Limit to first N pages to improve performance
+    max_pages = min(total_pages, MAX_PAGES_TO_PROCESS)
+    logger.info(f"Processing {max_pages} pages (total: {total_pages})")
+    
+    for page_num in range(max_pages):
+        try:
+            # Extract text from page
+            page_text = extract(pages[page_num])
+            
+            if page_text and page_text.strip():
+                text_content.append(page_text.strip())
+                pages_processed += 1
+                total_chars += len(text_content[-1])
+                logger.debug(f"Page {page_num + 1}: extracted {len(page_text)} characters")
+            else:
+                logger.debug(f"Page {page_num + 1}: no text extracted")
+                
+        except Exception as e:
+            logger.warning(f"Error processing page {page_num + 1}: {str(e)}")
+            continue  # Skip problematic pages
+        
+        if max_chars is not None and total_chars >= max_chars:
+            logger.info(f"Collected {total_chars} characters, skipping remaining pages")
+            break
+    
+    return text_content, pages_processed
+
+
+def extract_text_from_pdf(pdf_source: Union[str, Path, bytes, memoryview],
+                          max_chars: Optional[int] = None) -> str:
     """
     Extract text content from a PDF file with enhanced error handling.
     
     Args:
-        pdf_path: Path to the PDF file
+        pdf_source: Path to the PDF file, or the raw PDF bytes/memoryview (parsed in memory)
+        max_chars: Stop reading pages once this much text has been collected; callers that
+                   only use a prefix of the text (e.g. a prompt excerpt) can skip the rest
         
     Returns:
         Extracted text as a string
@@ -48,35 +110,27 @@ def extract_text_from_pdf(pdf_path: str) -> str:
         ValueError: If file is invalid or text extraction fails
         Exception: For other PDF processing errors
     """
-    validate_pdf_file(pdf_path)
+    # bytes/memoryview are handed to PyMuPDF as-is, so a getbuffer() view is parsed without a copy
+    in_memory = isinstance(pdf_source, (bytes, bytearray, memoryview))
+    if in_memory:
+        validate_pdf_bytes(pdf_source)
+    else:
+        validate_pdf_file(pdf_source)
     
     try:
-        logger.info(f"Extracting text from PDF: {pdf_path}")
-        text_content = []
-        pages_processed = 0
+        if in_memory:
+            logger.info(f"Extracting text from in-memory PDF ({len(pdf_source)} bytes)")
+        else:
+            logger.info(f"Extracting text from PDF: {pdf_source}")
         
-        with pdfplumber.open(pdf_path) as pdf:
-            total_pages = len(pdf.pages)
-            # Limit to first N pages to improve performance
-            max_pages = min(total_pages, MAX_PAGES_TO_PROCESS)
-            logger.info(f"Processing {max_pages} pages (total: {total_pages})")
-            
-            for page_num in range(max_pages):
-                try:
-                    page = pdf.pages[page_num]
-                    # Extract text from page
-                    page_text = page.extract_text()
-                    
-                    if page_text and page_text.strip():
-                        text_content.append(page_text.strip())
-                        pages_processed += 1
-                        logger.debug(f"Page {page_num + 1}: extracted {len(page_text)} characters")
-                    else:
-                        logger.debug(f"Page {page_num + 1}: no text extracted")
-                        
-                except Exception as e:
-                    logger.warning(f"Error processing page {page_num + 1}: {str(e)}")
-                    continue  # Skip problematic pages
+        if pymupdf is not None:
+            open_args = {'stream': pdf_source, 'filetype': 'pdf'} if in_memory else {'filename': pdf_source}
+            with pymupdf.open(**open_args) as doc:
+                text_content, pages_processed = _collect_page_text(doc, lambda page: page.get_text("text"), max_chars)
+        else:
+            logger.debug("PyMuPDF not installed, falling back to pdfplumber")
+            with pdfplumber.open(io.BytesIO(pdf_source) if in_memory else pdf_source) as pdf:
+                text_content, pages_processed = _collect_page_text(pdf.pages, lambda page: page.extract_text(), max_chars)
         
         if not text_content:
             logger.error("No text extracted from any page")